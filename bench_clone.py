@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замеры фаз клонирования на выгрузке заданного размера.
+Каждая фаза выполняется в отдельном процессе (spawn), поэтому пиковая память
+(ru_maxrss) и процессорное время относятся только к ней. Фазам, работающим над
+загруженным индексом, ConfigIndex строится до начала замера: разбор корневых
+файлов отдельно меряет load_index, а рост памяти считается от состояния после загрузки. Перед каждым повтором
+выгрузка копируется во временную папку, исходная не изменяется.
+Выгрузку нужного размера можно получить через generate_synthetic_config.py.
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import logging
+import resource
+import tempfile
+import statistics
+import multiprocessing
+
+import clone_catalog_linux as clone
+from config_index import ConfigIndex
+
+def phase_load_index(config_path, source, target, workers, index):
+    ConfigIndex(config_path)
+
+def phase_remove(config_path, source, target, workers, index):
+    clone.remove_existing_metadata(config_path, target)
+
+def phase_clone_metadata(config_path, source, target, workers, index):
+    clone.clone_object_metadata(index.file_path(f"Catalog.{source}"), index.file_path(f"Catalog.{target}"),
+                                source, target, workers)
+
+def phase_inject_configuration(config_path, source, target, workers, index):
+    clone.inject_object_into_configuration(index, f"Catalog.{target}")
+    index.save_configuration()
+
+def phase_inject_dump_info(config_path, source, target, workers, index):
+    clone.inject_object_into_dump_info(index, f"Catalog.{target}", f"Catalog.{source}")
+    index.save_dump_info()
+
+def phase_save_results(config_path, source, target, workers, index):
+    """Запись корневых файлов с пересчётом configVersion и кэша хэшей — как в конце clone_objects."""
+    clone.save_clone_results(index, only={f"Catalog.{source}", f"Catalog.{target}"})
+
+def phase_rewrite_dir(config_path, source, target, workers, index):
+    """Замена имён в папке самого большого документа (копия папки переименовывается туда и обратно)."""
+    documents = os.path.join(config_path, "Documents")
+    candidates = [entry.path for entry in os.scandir(documents) if entry.is_dir()] if os.path.isdir(documents) else []
+    if not candidates:
+        return
+    source_dir = max(candidates, key=lambda path: sum(len(files) for _, _, files in os.walk(path)))
+    name = os.path.basename(source_dir)
+    work_dir = source_dir + "_bench"
+    shutil.copytree(source_dir, work_dir)
+    clone.replace_names_in_dir(work_dir, name, name + "_bench", workers)
+    clone.replace_names_in_dir(work_dir, name + "_bench", name, workers)
+    shutil.rmtree(work_dir)
+
+def phase_full(config_path, source, target, workers, index):
+    clone.clone_objects(config_path, [(source, target)], workers)
+
+# Порядок важен: фазы выполняются над одной копией выгрузки
+PHASES = [
+    ("load_index", phase_load_index),
+    ("remove", phase_remove),
+    ("clone_metadata", phase_clone_metadata),
+    ("inject_configuration", phase_inject_configuration),
+    ("inject_dump_info", phase_inject_dump_info),
+    ("save_results", phase_save_results),
+    ("rewrite_dir", phase_rewrite_dir),
+    ("full", phase_full),
+]
+
+# Фазы, которым нужен загруженный индекс (строится вне замера)
+INDEXED_PHASES = {"clone_metadata", "inject_configuration", "inject_dump_info", "save_results"}
+
+def run_phase(name, config_path, source, target, workers):
+    """Тело дочернего процесса: выполнить фазу и вернуть замеры.
+
+    max_rss_mb — пик процесса (с загруженным индексом), rss_growth_mb — рост пика
+    за время самой фазы.
+    """
+    logging.disable(logging.INFO)
+    func = dict(PHASES)[name]
+    index = ConfigIndex(config_path) if name in INDEXED_PHASES else None
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    func(config_path, source, target, workers, index)
+    wall = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "wall": wall,
+        "cpu": (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+               + children.ru_utime + children.ru_stime,
+        # ru_maxrss в Linux — в килобайтах
+        "max_rss_mb": max(usage.ru_maxrss, children.ru_maxrss) / 1024,
+        "rss_growth_mb": (max(usage.ru_maxrss, children.ru_maxrss) - usage_before.ru_maxrss) / 1024,
+    }
+
+def bench(config_path, source, target, repeat=3, workers=None, phases=None, work_root=None):
+    """Прогнать фазы repeat раз; возвращает {фаза: {wall, cpu, max_rss_mb: [значения]}}."""
+    selected = [name for name, _ in PHASES if not phases or name in phases]
+    results = {name: {"wall": [], "cpu": [], "max_rss_mb": [], "rss_growth_mb": []} for name in selected}
+    context = multiprocessing.get_context("spawn")
+    for attempt in range(1, repeat + 1):
+        work_dir = tempfile.mkdtemp(prefix="bench_clone_", dir=work_root)
+        try:
+            copy_path = os.path.join(work_dir, "config")
+            shutil.copytree(config_path, copy_path, ignore=shutil.ignore_patterns(".refindex.json", ".dumpinfo-cache.json"))
+            for name in selected:
+                if name == "full":
+                    # Полный прогон — на свежей копии, чтобы не зависеть от предыдущих фаз
+                    shutil.rmtree(copy_path)
+                    shutil.copytree(config_path, copy_path, ignore=shutil.ignore_patterns(".refindex.json", ".dumpinfo-cache.json"))
+                with context.Pool(1) as pool:
+                    sample = pool.apply(run_phase, (name, copy_path, source, target, workers))
+                for key, value in sample.items():
+                    results[name][key].append(value)
+                logging.info(f"[{attempt}/{repeat}] {name}: {sample['wall']:.3f} с, CPU {sample['cpu']:.3f} с, "
+                             f"RSS {sample['max_rss_mb']:.1f} МБ (+{sample['rss_growth_mb']:.1f} МБ за фазу)")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def summarize(results):
+    """Медианы по повторам."""
+    return {name: {key: statistics.median(values) for key, values in samples.items()}
+            for name, samples in results.items()}
+
+def print_table(summary):
+    print(f"{'Фаза':<22}{'Время, с':>12}{'CPU, с':>12}{'RSS, МБ':>12}{'Рост RSS, МБ':>14}")
+    for name, values in summary.items():
+        print(f"{name:<22}{values['wall']:>12.3f}{values['cpu']:>12.3f}{values['max_rss_mb']:>12.1f}"
+              f"{values['rss_growth_mb']:>14.1f}")
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры фаз клонирования справочника.")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Путь к выгрузке (по умолчанию текущая директория)')
+    parser.add_argument('--source', default='Предметы', help='Исходный справочник')
+    parser.add_argument('--target', default='УТО_Бенч', help='Целевой справочник')
+    parser.add_argument('--repeat', type=int, default=3, help='Число повторов (в отчёте медиана)')
+    parser.add_argument('--workers', type=int, help='Число процессов для замены имён в папках')
+    parser.add_argument('--phase', action='append', dest='phases', choices=[name for name, _ in PHASES],
+                        help='Замерить только указанные фазы (можно несколько)')
+    parser.add_argument('--work-dir', help='Папка для временных копий выгрузки (по умолчанию системная)')
+    parser.add_argument('--json', dest='json_path', help='Сохранить все замеры и медианы в JSON')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        results = bench(args.config_path, args.source, args.target, args.repeat, args.workers, args.phases, args.work_dir)
+        summary = summarize(results)
+        print_table(summary)
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump({"config_path": os.path.abspath(args.config_path), "repeat": args.repeat,
+                           "samples": results, "median": summary}, f, ensure_ascii=False, indent=2)
+            logging.info(f"Замеры сохранены в {args.json_path}")
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
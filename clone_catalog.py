@@ -12,6 +12,9 @@ import argparse
 import logging
 from lxml import etree
 
+from config_index import ConfigIndex
+from xml_writer import write_xml
+
 def generate_uuid():
     return str(uuid.uuid4())
 
@@ -71,57 +74,28 @@ def clone_catalog(config_path, source_catalog='Предметы', target_catalog
         catalog.set("uuid", generate_uuid())
 
     # Сохранить новый файл
-    tree.write(uto_test_xml, encoding="UTF-8", xml_declaration=True, pretty_print=True)
+    write_xml(uto_test_xml, tree)
     logging.info(f"Создан файл {uto_test_xml}")
 
+    index = ConfigIndex(config_path)
+
     # Шаг 2: Обновить Configuration.xml
     logging.info(f"Обновляем {configuration_xml}")
-    config_tree = etree.parse(configuration_xml)
-    config_root = config_tree.getroot()
-
-    child_objects = config_root.find(".//{http://v8.1c.ru/8.3/MDClasses}ChildObjects")
-    if child_objects is None:
-        raise ValueError("Не найдена секция ChildObjects в Configuration.xml")
 
     # Удалить существующий target_catalog, если есть
-    for cat in child_objects.findall(".//{http://v8.1c.ru/8.3/MDClasses}Catalog"):
-        if cat.text == target_catalog:
-            child_objects.remove(cat)
-            logging.info(f"Удален существующий {target_catalog} из Configuration.xml")
-            break
+    if index.remove_child(f"Catalog.{target_catalog}"):
+        logging.info(f"Удален существующий {target_catalog} из Configuration.xml")
 
     # Вставить после последнего Catalog
-    catalogs = child_objects.findall(".//{http://v8.1c.ru/8.3/MDClasses}Catalog")
-    last_catalog = catalogs[-1] if catalogs else None
-    new_catalog = etree.Element("{http://v8.1c.ru/8.3/MDClasses}Catalog")
-    new_catalog.text = target_catalog
-    if last_catalog is not None:
-        child_objects.insert(child_objects.index(last_catalog) + 1, new_catalog)
-    else:
-        child_objects.append(new_catalog)
-
-    config_tree.write(configuration_xml, encoding="UTF-8", xml_declaration=True, pretty_print=True)
-    logging.info(f"Обновлен {configuration_xml}")
+    index.add_child(f"Catalog.{target_catalog}")
+    index.save_configuration()
 
     # Шаг 3: Обновить ConfigDumpInfo.xml
     logging.info(f"Обновляем {config_dump_info_xml}")
-    dump_tree = etree.parse(config_dump_info_xml)
-    dump_root = dump_tree.getroot()
-
-    config_versions = dump_root.find(".//{http://v8.1c.ru/8.3/xcf/dumpinfo}ConfigVersions")
-    if config_versions is None:
-        raise ValueError("Не найдена секция ConfigVersions в ConfigDumpInfo.xml")
 
     # Удалить существующий target_catalog, если есть
-    for meta in config_versions.findall(".//{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata"):
-        if meta.get("name") == f"Catalog.{target_catalog}":
-            config_versions.remove(meta)
-            logging.info(f"Удален существующий Catalog.{target_catalog} из ConfigDumpInfo.xml")
-            break
-
-    # Найти последний Catalog
-    catalog_metas = [m for m in config_versions.findall(".//{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata") if m.get("name").startswith("Catalog.")]
-    last_catalog_meta = catalog_metas[-1] if catalog_metas else None
+    if index.remove_dump_entry(f"Catalog.{target_catalog}"):
+        logging.info(f"Удален существующий Catalog.{target_catalog} из ConfigDumpInfo.xml")
 
     # Создать новый Metadata для target_catalog
     new_meta = etree.Element("{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata")
@@ -130,7 +104,7 @@ def clone_catalog(config_path, source_catalog='Предметы', target_catalog
     new_meta.set("configVersion", "0000000000000000000000000000000000000000")
 
     # Добавить атрибуты из оригинала
-    original_meta = next((m for m in config_versions.findall(".//{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata") if m.get("name") == f"Catalog.{source_catalog}"), None)
+    original_meta = index.dump_entry(f"Catalog.{source_catalog}")
     if original_meta is not None:
         for child in original_meta:
             new_child = etree.Element("{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata")
@@ -138,13 +112,8 @@ def clone_catalog(config_path, source_catalog='Предметы', target_catalog
             new_child.set("id", generate_uuid())
             new_meta.append(new_child)
 
-    if last_catalog_meta is not None:
-        config_versions.insert(config_versions.index(last_catalog_meta) + 1, new_meta)
-    else:
-        config_versions.append(new_meta)
-
-    dump_tree.write(config_dump_info_xml, encoding="UTF-8", xml_declaration=True, pretty_print=True)
-    logging.info(f"Обновлен {config_dump_info_xml}")
+    index.add_dump_entry(new_meta)
+    index.save_dump_info()
 
     logging.info("Клонирование завершено успешно.")
 
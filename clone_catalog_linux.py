@@ -3,219 +3,813 @@
 """
 Скрипт для клонирования каталога Предметы в УТО_Тест в 1C конфигурации (Linux версия)
 Адаптирован из PowerShell версии с хирургической точностью.
+Кроме справочников клонирует документы, регистры сведений и накопления и отчёты:
+папки, сгенерированные типы и порядок ChildObjects берутся из реестра типов config_index.
 Использует lxml для манипуляции XML.
 """
 
 import os
+import re
 import uuid
 import argparse
 import logging
 import shutil
+import time
+import cProfile
+import pstats
+import itertools
+import functools
+import concurrent.futures
 from lxml import etree
 
-def generate_uuid():
-    return str(uuid.uuid4())
+from config_index import ConfigIndex, TYPE_FOLDERS, GENERATED_TYPES, MD_NS, XR_NS, DUMP_NS, split_full_name, object_full_name
+from dump_info import DigestCache, DumpInfoStream, EMPTY_CONFIG_VERSION, SUBOBJECT_FOLDERS, update_config_versions
+from instrumentation import tracer
+from ref_index import REFERENCE_PREFIXES, ReferenceIndex, path_owner
+from xml_writer import parse_xml, write_xml
 
-def replace_names_in_dir(dir_path, source_name, target_name):
+# Меньше файлов выгоднее обработать в текущем процессе, чем поднимать пул
+REWRITE_PARALLEL_THRESHOLD = 32
+
+# ioctl клонирования файла (reflink) в Linux
+FICLONE = 0x40049409
+
+# Пространство имён детерминированных UUID (из UUID конфигурации); None — случайные uuid4
+uuid_namespace = None
+
+# Файлы, созданные или изменённые за текущий запуск (для частичной загрузки в Designer)
+touched_files = set()
+
+def generate_uuid(target_name=None, node_path=None):
+    """Новый UUID узла.
+
+    В детерминированном режиме UUID выводится через uuid5 из UUID конфигурации,
+    имени целевого объекта и пути узла, поэтому повторный запуск даёт те же значения.
+    """
+    if uuid_namespace is None or node_path is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid_namespace, f"{target_name}:{node_path}"))
+
+def set_deterministic_uuids(config_id):
+    """Включить детерминированные UUID для конфигурации с данным UUID (None — выключить)."""
+    global uuid_namespace
+    uuid_namespace = uuid.UUID(config_id) if config_id else None
+
+def record_touched(*paths):
+    for path in paths:
+        touched_files.add(os.path.abspath(path))
+
+def write_partial_load_list(list_path, config_path):
+    """Запись списка файлов для /LoadConfigFromFiles -listFile ... -partial.
+
+    В список попадают все созданные и изменённые за запуск файлы (полные пути)
+    плюс Configuration.xml и ConfigDumpInfo.xml. Возвращает число строк.
+    """
+    record_touched(os.path.join(config_path, "Configuration.xml"), os.path.join(config_path, "ConfigDumpInfo.xml"))
+    paths = sorted(path for path in touched_files if os.path.isfile(path))
+    with open(list_path, 'w', encoding='utf-8-sig', newline='\r\n') as f:
+        for path in paths:
+            f.write(path + '\n')
+    logging.info(f"Список частичной загрузки ({len(paths)} файлов): {list_path}")
+    return len(paths)
+
+def object_uuid_nodes(object_node, object_path):
+    """Узлы объекта метаданных с атрибутом uuid и их пути: [('Catalog.X', узел), ('Catalog.X.Attribute.Y', узел), ...].
+
+    Путь строится так же, как имя записи в ConfigDumpInfo.xml: цепочка
+    <Вид>.<Имя> от корня объекта до узла с атрибутом uuid.
+    """
+    result = [(object_path, object_node)]
+    def walk(node, path):
+        for child in node.iterchildren(etree.Element):
+            if child.get("uuid"):
+                name = child.findtext(f"{MD_NS}Properties/{MD_NS}Name")
+                child_path = f"{path}.{etree.QName(child).localname}.{name}"
+                result.append((child_path, child))
+                walk(child, child_path)
+            else:
+                walk(child, path)
+    walk(object_node, object_path)
+    return result
+
+def rename_prefixes(type_name):
+    """Префиксы ссылок на объекты типа: Catalog, CatalogRef, Справочники, ... (длинные первыми)."""
+    return tuple(sorted((prefix for prefix, types in REFERENCE_PREFIXES.items() if type_name in types),
+                        key=len, reverse=True))
+
+def compile_name_pattern(source_name, type_name=None):
+    """Шаблон ссылки на объект в точечной нотации: .Имя, за которым не идёт продолжение идентификатора.
+
+    С type_name засчитываются только ссылки через префиксы этого типа
+    (Report.X, ОтчетОбъект.X), чтобы не задеть одноимённый объект другого типа.
+    """
+    if type_name is None:
+        return re.compile(r'(?<=\.)' + re.escape(source_name) + r'(?!\w)')
+    prefixes = '|'.join(re.escape(prefix) for prefix in rename_prefixes(type_name))
+    return re.compile(r'(?<!\w)((?:' + prefixes + r')\.)' + re.escape(source_name) + r'(?!\w)')
+
+def rename_metadata_names(root, source_name, target_name, type_name=None):
+    """Переименование объекта прямо в дереве за один проход.
+
+    Меняются текст узлов, равный имени целиком (Name, содержимое Synonym), и
+    ссылки в точечной нотации в тексте и атрибутах (GeneratedType/@name,
+    cfg:CatalogRef.X, Catalog.X.StandardAttribute.Code). Возвращает число замен.
+    """
+    pattern = compile_name_pattern(source_name, type_name)
+    replacement = target_name if type_name is None else lambda m: m.group(1) + target_name
+    renamed = 0
+    for node in root.iter(etree.Element):
+        text = node.text
+        if text and source_name in text:
+            if text == source_name:
+                node.text = target_name
+                renamed += 1
+            else:
+                new_text, count = pattern.subn(replacement, text)
+                if count:
+                    node.text = new_text
+                    renamed += count
+        for key, value in node.items():
+            if source_name in value:
+                new_value, count = pattern.subn(replacement, value)
+                if count:
+                    node.set(key, new_value)
+                    renamed += count
+    return renamed
+
+@functools.lru_cache(maxsize=None)
+def compile_rename_matcher(renames):
+    """Один шаблон для всех переименований: .Имя и >Имя< для каждого Имени из renames.
+
+    renames — кортеж пар (источник, цель) или троек (источник, цель, тип). Длинные
+    имена идут первыми, чтобы более длинное имя не перекрывалось своим префиксом.
+    Для троек вместо .Имя ищется <префикс>.Имя (группы: префикс, имя, >имя<).
+    """
+    names = sorted((rename[0] for rename in renames), key=len, reverse=True)
+    alternation = '|'.join(re.escape(name) for name in names)
+    type_names = {rename[2] for rename in renames if len(rename) > 2}
+    if not type_names:
+        return re.compile(r'(?<=\.)(' + alternation + r')(?!\w)|(?<=>)(' + alternation + r')(?=<)')
+    prefixes = sorted({prefix for type_name in type_names for prefix in rename_prefixes(type_name)}, key=len, reverse=True)
+    return re.compile(r'(?<!\w)((?:' + '|'.join(re.escape(prefix) for prefix in prefixes) + r')\.)(' + alternation
+                      + r')(?!\w)|(?<=>)(' + alternation + r')(?=<)')
+
+def rename_replacer(renames):
+    """Функция замены для compile_rename_matcher(renames).sub."""
+    targets = {rename[0]: rename[1] for rename in renames}
+    allowed = {rename[0]: set(rename_prefixes(rename[2])) for rename in renames if len(rename) > 2}
+    def replace(match):
+        if match.re.groups == 2:
+            return targets[match.group(1) or match.group(2)]
+        if match.group(3):
+            return targets[match.group(3)]
+        prefix, name = match.group(1), match.group(2)
+        # Префикс другого типа (РегистрНакопления.X при клонировании Report.X) не трогаем
+        if name in allowed and prefix[:-1] not in allowed[name]:
+            return match.group(0)
+        return prefix + targets[name]
+    return replace
+
+def rewrite_file(file_path, renames, target_path=None):
+    """Замена имён в одном файле; файл записывается, только если что-то изменилось.
+
+    Без target_path файл переписывается на месте, иначе результат пишется в
+    target_path (а файл без вхождений не пишется вовсе — его можно связать).
+    Возвращает (путь, байт прочитано, байт записано, число замен, ошибка).
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        # Быстрая проверка по байтам: без вхождений нет смысла декодировать
+        if not any(rename[0].encode('utf-8') in data for rename in renames):
+            return file_path, len(data), 0, 0, None
+        content, count = compile_rename_matcher(renames).subn(rename_replacer(renames), data.decode('utf-8'))
+        if not count:
+            return file_path, len(data), 0, 0, None
+        new_data = content.encode('utf-8')
+        output_path = target_path or file_path
+        if os.path.exists(output_path) and os.stat(output_path).st_nlink > 1:
+            # Жёсткая ссылка на файл донора (--link-mode hardlink): разорвать её, иначе изменится и донор
+            os.remove(output_path)
+        with open(output_path, 'wb') as f:
+            f.write(new_data)
+        return file_path, len(data), len(new_data), count, None
+    except Exception as e:
+        return file_path, 0, 0, 0, str(e)
+
+def rewrite_file_timed(file_path, renames, target_path=None):
+    """rewrite_file с замером времени для трассировки: (результат, начало нс, длительность нс, pid)."""
+    start = time.perf_counter_ns()
+    result = rewrite_file(file_path, renames, target_path)
+    return result, start, time.perf_counter_ns() - start, os.getpid()
+
+def map_rewrites(file_paths, renames, target_paths=None, workers=None):
+    """Выполнить rewrite_file для списка файлов (пулом процессов, если файлов много).
+
+    Возвращает результаты rewrite_file в порядке file_paths. При включённой
+    трассировке каждый файл попадает в неё отдельным интервалом на дорожке своего процесса.
+    """
+    if target_paths is None:
+        target_paths = [None] * len(file_paths)
+    func = rewrite_file_timed if tracer.enabled else rewrite_file
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 8)
+    if workers > 1 and len(file_paths) >= REWRITE_PARALLEL_THRESHOLD:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(file_paths) // (workers * 4))
+            results = list(pool.map(func, file_paths, itertools.repeat(renames), target_paths, chunksize=chunksize))
+    else:
+        results = [func(file_path, renames, target_path) for file_path, target_path in zip(file_paths, target_paths)]
+    if not tracer.enabled:
+        return results
+    plain = []
+    for result, start, duration, pid in results:
+        file_path, bytes_read, bytes_written, count, error = result
+        tracer.complete(os.path.basename(file_path), start, duration, pid, path=file_path,
+                        bytes_read=bytes_read, bytes_written=bytes_written, replacements=count)
+        tracer.add(files_read=1, bytes_read=bytes_read, files_written=1 if count else 0,
+                   bytes_written=bytes_written, replacements=count)
+        plain.append(result)
+    return plain
+
+def reflink_file(source_path, target_path):
+    """Копирование через reflink (ioctl FICLONE): btrfs, xfs, bcachefs и т.п."""
+    import fcntl
+    with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(target_path)
+            raise
+
+def link_file(source_path, target_path, link_mode):
+    """Материализация неизменяемого файла без копирования данных, если возможно.
+
+    link_mode: copy — обычная копия; reflink — только reflink; hardlink — только
+    жёсткая ссылка; auto — reflink, затем жёсткая ссылка, затем копия.
+    Возвращает фактически использованный способ.
+    """
+    if link_mode in ('reflink', 'auto'):
+        try:
+            reflink_file(source_path, target_path)
+            return 'reflink'
+        except (OSError, ImportError):
+            if link_mode == 'reflink':
+                raise
+    if link_mode in ('hardlink', 'auto'):
+        try:
+            os.link(source_path, target_path)
+            return 'hardlink'
+        except OSError:
+            if link_mode == 'hardlink':
+                raise
+    shutil.copy2(source_path, target_path)
+    return 'copy'
+
+def object_renames(source_name, target_name, type_name=None):
+    """Кортеж переименований для rewrite_file: с типом — только ссылки через префиксы этого типа."""
+    return ((source_name, target_name, type_name),) if type_name else ((source_name, target_name),)
+
+def clone_object_dir(source_dir, target_dir, source_name, target_name, link_mode='copy', workers=None, type_name=None):
+    """Клонирование папки объекта с заменой имён за один проход.
+
+    Файлы .xml/.bsl, содержащие имя источника, сразу пишутся в цель уже
+    переименованными; остальные файлы (макеты, картинки, справка и файлы без
+    вхождений) связываются согласно link_mode. Жёсткие ссылки разделяют данные с
+    донором, поэтому их нельзя редактировать на месте — только заменой файла.
+    Возвращает статистику как replace_names_in_dir плюс files_linked и счётчики способов.
+    """
+    renames = object_renames(source_name, target_name, type_name)
+    candidates = []
+    plain = []
+    for root, dirs, files in os.walk(source_dir):
+        target_root = os.path.join(target_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            pair = (os.path.join(root, file), os.path.join(target_root, file))
+            if file.endswith('.xml') or file.endswith('.bsl'):
+                candidates.append(pair)
+            else:
+                plain.append(pair)
+    
+    results = map_rewrites([src for src, _ in candidates], renames, [dst for _, dst in candidates], workers)
+    
+    stats = {"files_scanned": 0, "bytes_scanned": 0, "files_changed": 0, "bytes_written": 0, "replacements": 0,
+             "files_linked": 0, "copy": 0, "reflink": 0, "hardlink": 0}
+    for (file_path, bytes_read, bytes_written, count, error), (_, dst) in zip(results, candidates):
+        if error is not None:
+            raise OSError(f"Не удалось клонировать {file_path}: {error}")
+        stats["files_scanned"] += 1
+        stats["bytes_scanned"] += bytes_read
+        if count:
+            stats["files_changed"] += 1
+            stats["bytes_written"] += bytes_written
+            stats["replacements"] += count
+            logging.debug(f"Создан файл: {dst} ({count} замен)")
+            record_touched(dst)
+        else:
+            plain.append((file_path, dst))
+    for src, dst in plain:
+        stats[link_file(src, dst, link_mode)] += 1
+        tracer.add(files_written=1)
+        stats["files_linked"] += 1
+        record_touched(dst)
+    
+    logging.info(f"Переписано файлов: {stats['files_changed']} ({stats['bytes_written']} байт, {stats['replacements']} замен), "
+                 f"связано без перезаписи: {stats['files_linked']} "
+                 f"(reflink: {stats['reflink']}, hardlink: {stats['hardlink']}, copy: {stats['copy']})")
+    return stats
+
+def replace_names_in_dir(dir_path, source_name, target_name, workers=None, type_name=None):
+    """Замена имён во всех .xml/.bsl файлах папки объекта.
+
+    Файлы обрабатываются пулом процессов (workers=1 — последовательно), каждый
+    файл просматривается одним проходом, неизменённые файлы не перезаписываются.
+    Возвращает статистику: files_scanned, bytes_scanned, files_changed, bytes_written, replacements.
+    """
+    renames = object_renames(source_name, target_name, type_name)
+    file_paths = []
     for root, dirs, files in os.walk(dir_path):
         for file in files:
             if file.endswith('.xml') or file.endswith('.bsl'):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    content = content.replace(f".{source_name}", f".{target_name}")
-                    content = content.replace(f">{source_name}<", f">{target_name}<")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                    logging.info(f"Обновлён файл: {file_path}")
-                except Exception as e:
-                    logging.warning(f"Не удалось обновить {file_path}: {e}")
+                file_paths.append(os.path.join(root, file))
+    
+    results = map_rewrites(file_paths, renames, workers=workers)
+    
+    stats = {"files_scanned": 0, "bytes_scanned": 0, "files_changed": 0, "bytes_written": 0, "replacements": 0}
+    for file_path, bytes_read, bytes_written, count, error in results:
+        if error is not None:
+            logging.warning(f"Не удалось обновить {file_path}: {error}")
+            continue
+        stats["files_scanned"] += 1
+        stats["bytes_scanned"] += bytes_read
+        if count:
+            stats["files_changed"] += 1
+            stats["bytes_written"] += bytes_written
+            stats["replacements"] += count
+            logging.debug(f"Обновлён файл: {file_path} ({count} замен)")
+            record_touched(file_path)
+    logging.info(f"Просмотрено файлов: {stats['files_scanned']} ({stats['bytes_scanned']} байт), "
+                 f"изменено: {stats['files_changed']} ({stats['bytes_written']} байт, {stats['replacements']} замен)")
+    return stats
 
 def setup_logging(verbose=False):
     level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def remove_existing_metadata(config_path, catalog_name):
-    logging.info(f"Удаление существующих следов {catalog_name} (идемпотентность)")
+def remove_existing_metadata(config_path, name, type_name="Catalog"):
+    logging.info(f"Удаление существующих следов {type_name}.{name} (идемпотентность)")
+    folder = os.path.join(config_path, TYPE_FOLDERS[type_name])
     
-    # Удаление каталога справочника
-    catalog_dir = os.path.join(config_path, "Catalogs", catalog_name)
-    if os.path.exists(catalog_dir):
-        shutil.rmtree(catalog_dir)
-        logging.info(f"Удалён каталог: {catalog_dir}")
+    # Удаление папки объекта
+    object_dir = os.path.join(folder, name)
+    if os.path.exists(object_dir):
+        shutil.rmtree(object_dir)
+        logging.info(f"Удалён каталог: {object_dir}")
     
-    # Удаление XML файла справочника
-    catalog_file = os.path.join(config_path, "Catalogs", f"{catalog_name}.xml")
-    if os.path.exists(catalog_file):
-        os.remove(catalog_file)
-        logging.info(f"Удалён файл: {catalog_file}")
+    # Удаление XML файла объекта
+    object_file = os.path.join(folder, f"{name}.xml")
+    if os.path.exists(object_file):
+        os.remove(object_file)
+        logging.info(f"Удалён файл: {object_file}")
+
+def descriptor_files(object_dir):
+    """Файлы описаний форм, макетов и команд в папке объекта: [(вид, путь)], например ('Form', .../Forms/X.xml)."""
+    result = []
+    for kind, folder in SUBOBJECT_FOLDERS.items():
+        folder_path = os.path.join(object_dir, folder)
+        if os.path.isdir(folder_path):
+            result.extend((kind, entry.path) for entry in sorted(os.scandir(folder_path), key=lambda e: e.name)
+                          if entry.is_file() and entry.name.endswith('.xml'))
+    return result
+
+def descriptor_uuid_nodes(root, object_path, kind, path):
+    """Узлы с uuid файла описания Forms/X.xml: пути вида <Тип>.<Имя>.Form.X, как в ConfigDumpInfo.xml."""
+    node = next(root.iterchildren(etree.Element), None)
+    if node is None or not node.get("uuid"):
+        return []
+    return object_uuid_nodes(node, f"{object_path}.{kind}.{os.path.splitext(os.path.basename(path))[0]}")
+
+def regenerate_descriptor_uuids(path, object_path, kind, target_name):
+    """Новые UUID в файле описания формы или макета клона. Возвращает их число.
+
+    Файл заменяется атомарно, поэтому жёсткая ссылка на файл донора не портится.
+    """
+    tree, original = parse_xml(path)
+    nodes = descriptor_uuid_nodes(tree.getroot(), object_path, kind, path)
+    for node_path, node in nodes:
+        node.set("uuid", generate_uuid(target_name, node_path))
+    if nodes:
+        write_xml(path, tree, original)
+    return len(nodes)
+
+def clone_object_ids(object_node, object_dir, object_path):
+    """UUID клона по путям записей ConfigDumpInfo.xml: объект, вложенные объекты, формы и макеты."""
+    ids = {}
+    if object_node is not None:
+        ids.update((path, node.get("uuid")) for path, node in object_uuid_nodes(object_node, object_path))
+    for kind, path in descriptor_files(object_dir):
+        root = etree.parse(path).getroot()
+        ids.update((node_path, node.get("uuid")) for node_path, node in descriptor_uuid_nodes(root, object_path, kind, path))
+    return ids
 
-def clone_catalog_metadata(source_path, target_path, source_name, target_name):
-    logging.info(f"Загрузка донорского справочника: {source_name}")
+def clone_object_metadata(source_path, target_path, source_name, target_name, workers=None, link_mode='copy',
+                          clone_dir=True, type_name="Catalog"):
+    logging.info(f"Загрузка донора: {type_name}.{source_name}")
     tree = etree.parse(source_path)
+    tracer.add(files_read=1, bytes_read=os.path.getsize(source_path))
     root = tree.getroot()
     
     logging.info(f"Выполнение генетической замены: {source_name} -> {target_name}")
-    # Замена внутренних ссылок (точечная нотация)
-    content = etree.tostring(tree, encoding='unicode', method='xml')
-    content = content.replace(f".{source_name}", f".{target_name}")
-    # Замена содержимого тегов
-    content = content.replace(f">{source_name}<", f">{target_name}<")
-    
-    # Парсим обратно как ElementTree
-    tree = etree.ElementTree(etree.fromstring(content.encode('utf-8')))
+    renamed = rename_metadata_names(root, source_name, target_name, type_name)
+    logging.info(f"Заменено ссылок: {renamed}")
     
     logging.info("Регенерация UUID генома")
     
     # Назначаем новый корневой UUID
-    catalog = tree.find(".//{http://v8.1c.ru/8.3/MDClasses}Catalog")
-    if catalog is not None:
-        new_root_uuid = generate_uuid()
-        catalog.set("uuid", new_root_uuid)
+    object_node = next(root.iterchildren(etree.Element), None)
+    if object_node is not None and etree.QName(object_node).localname != type_name:
+        raise ValueError(f"{source_path} описывает {etree.QName(object_node).localname}, а не {type_name}")
+    if object_node is not None:
+        new_root_uuid = generate_uuid(target_name, f"{type_name}.{target_name}")
+        object_node.set("uuid", new_root_uuid)
         logging.info(f"Корневой UUID: {new_root_uuid}")
+        
+        # Реквизиты, табличные части и прочие вложенные объекты получают свои UUID,
+        # иначе они совпадут с UUID донора
+        nested = object_uuid_nodes(object_node, f"{type_name}.{target_name}")[1:]
+        for path, node in nested:
+            node.set("uuid", generate_uuid(target_name, path))
+        tracer.add(uuids_regenerated=len(nested))
+        logging.info(f"Регенерировано UUID вложенных объектов: {len(nested)}")
     
     # Регенерация всех TypeId и ValueId UUID в InternalInfo
     # КРИТИЧНО для 8.3.25: используем sub-nodes <xr:TypeId> и <xr:ValueId>
-    generated_types = tree.findall(".//{http://v8.1c.ru/8.3/xcf/readable}GeneratedType")
+    generated_types = tree.findall(f".//{XR_NS}GeneratedType")
     regenerated_count = 0
     
     for gen_type in generated_types:
-        type_id_node = gen_type.find(".//{http://v8.1c.ru/8.3/xcf/readable}TypeId")
-        value_id_node = gen_type.find(".//{http://v8.1c.ru/8.3/xcf/readable}ValueId")
+        type_id_node = gen_type.find(f".//{XR_NS}TypeId")
+        value_id_node = gen_type.find(f".//{XR_NS}ValueId")
         
         if type_id_node is not None:
-            type_id_node.text = generate_uuid()
+            type_id_node.text = generate_uuid(target_name, f"{gen_type.get('name')}.TypeId")
             regenerated_count += 1
         if value_id_node is not None:
-            value_id_node.text = generate_uuid()
+            value_id_node.text = generate_uuid(target_name, f"{gen_type.get('name')}.ValueId")
             regenerated_count += 1
     
     logging.info(f"Регенерировано UUID: {regenerated_count} узлов")
+    tracer.add(uuids_regenerated=regenerated_count + (object_node is not None))
+    missing = sorted({f"{type_name}{category}.{target_name}" for category in GENERATED_TYPES.get(type_name, ())}
+                     - {gen_type.get('name') for gen_type in generated_types})
+    if missing:
+        logging.warning(f"В InternalInfo нет сгенерированных типов: {', '.join(missing)}")
     
-    # Сохранить с правильным форматированием
-    tree.write(target_path, encoding="UTF-8", xml_declaration=True, pretty_print=True)
+    # Сохранить в исходном форматировании донора (BOM, табы, кавычки)
+    write_xml(target_path, tree)
+    record_touched(target_path)
     logging.info(f"Создан файл {target_path}")
     
-    # Копировать папку справочника, если существует
+    # Копировать папку объекта, если существует
     source_dir = os.path.join(os.path.dirname(source_path), source_name)
     target_dir = os.path.join(os.path.dirname(target_path), target_name)
-    if os.path.exists(source_dir):
-        shutil.copytree(source_dir, target_dir)
+    if clone_dir and os.path.exists(source_dir):
+        with tracer.span("clone_object_dir", cat="step", source=source_dir):
+            clone_object_dir(source_dir, target_dir, source_name, target_name, link_mode, workers, type_name)
+            # Формы и макеты — отдельные объекты со своими UUID
+            count = sum(regenerate_descriptor_uuids(path, f"{type_name}.{target_name}", kind, target_name)
+                        for kind, path in descriptor_files(target_dir))
+            tracer.add(uuids_regenerated=count)
         logging.info(f"Скопирована папка {source_dir} в {target_dir}")
-        # Заменить имена в файлах папки
-        replace_names_in_dir(target_dir, source_name, target_name)
 
-def inject_into_configuration(configuration_xml_path, catalog_name):
+def inject_object_into_configuration(index, full_name):
+    """Вставка ссылки на объект в ChildObjects Configuration.xml, загруженного в индекс."""
+    if index.remove_child(full_name):
+        logging.info("Удалена существующая ссылка")
+    
+    type_name = split_full_name(full_name)[0]
+    had_objects = index.last_child_node(type_name) is not None
+    # После последнего объекта того же типа, а если их нет — перед первым типом, идущим позже
+    index.add_child(full_name)
+    if had_objects:
+        logging.info(f"Вставлено после последнего {type_name}")
+    else:
+        logging.info(f"Вставлено как первый {type_name}")
+
+def inject_into_configuration(configuration_xml_path, catalog_name, type_name="Catalog"):
     logging.info("Внедрение в Configuration.xml (топологический порядок)")
     
-    tree = etree.parse(configuration_xml_path)
-    root = tree.getroot()
+    index = ConfigIndex(os.path.dirname(os.path.abspath(configuration_xml_path)))
+    inject_object_into_configuration(index, f"{type_name}.{catalog_name}")
+    index.save_configuration()
+
+def build_dump_entries(full_name, donor_entries, ids, tag):
+    """Корневые записи клона full_name для ConfigDumpInfo.xml с нулевой configVersion.
+
+    donor_entries — корневые записи донора (сама запись и записи форм, модулей,
+    макетов); они копируются с дочерними Metadata и заменой имени донора на
+    full_name. id берутся из ids (uuid уже записанных файлов клона), id вида
+    <uuid>.N (модули, Form.xml) — от id родительской записи, остальные
+    генерируются. Без записей донора создаётся одна запись объекта. tag — имя
+    тега записи (с пространством имён для дерева, без него для потоковой записи).
+    """
+    target_name = split_full_name(full_name)[1]
     
-    child_objects = root.find(".//{http://v8.1c.ru/8.3/MDClasses}ChildObjects")
-    if child_objects is None:
-        raise ValueError("Узел ChildObjects не найден в Configuration.xml")
+    def entry_id(name, donor_id):
+        base, _, suffix = (donor_id or "").partition('.')
+        if suffix:
+            parent = name.rsplit('.', 1)[0]
+            return f"{ids.get(parent) or generate_uuid(target_name, parent)}.{suffix}"
+        return ids.get(name) or generate_uuid(target_name, name)
     
-    # Удаляем существующую ссылку на справочник, если есть
-    for cat in child_objects.findall("Catalog"):
-        if cat.text == catalog_name:
-            child_objects.remove(cat)
-            logging.info("Удалена существующая ссылка")
-            break
+    if not donor_entries:
+        new_meta = etree.Element(tag)
+        new_meta.set("name", full_name)
+        new_meta.set("id", entry_id(full_name, None))
+        new_meta.set("configVersion", EMPTY_CONFIG_VERSION)
+        return [new_meta]
     
-    # Находим последний узел Catalog для вставки после него
-    catalogs = child_objects.findall("Catalog")
-    last_catalog = catalogs[-1] if catalogs else None
+    source_full_name = object_full_name(donor_entries[0].get("name"))
     
-    # Создаём новый узел справочника
-    new_catalog = etree.Element("{http://v8.1c.ru/8.3/MDClasses}Catalog")
-    new_catalog.text = catalog_name
+    def copy_entry(donor, parent):
+        name = full_name + donor.get("name")[len(source_full_name):]
+        new_meta = etree.Element(tag) if parent is None else etree.SubElement(parent, tag)
+        new_meta.set("name", name)
+        new_meta.set("id", entry_id(name, donor.get("id")))
+        if parent is None or donor.get("configVersion") is not None:
+            new_meta.set("configVersion", EMPTY_CONFIG_VERSION)
+        new_meta.text = donor.text
+        if parent is not None:
+            new_meta.tail = donor.tail
+        for child in donor:
+            if isinstance(child.tag, str):
+                copy_entry(child, new_meta)
+        return new_meta
     
-    if last_catalog is not None:
-        child_objects.insert(child_objects.index(last_catalog) + 1, new_catalog)
-        logging.info("Вставлено после последнего Catalog")
-    else:
-        # Справочников нет, вставляем перед Documents
-        first_document = child_objects.find(".//{http://v8.1c.ru/8.3/MDClasses}Document")
-        if first_document is not None:
-            child_objects.insert(child_objects.index(first_document), new_catalog)
-        else:
-            child_objects.append(new_catalog)
-        logging.info("Вставлено как первый Catalog")
+    return [copy_entry(donor, None) for donor in donor_entries]
+
+def inject_object_into_dump_info(index, full_name, source_full_name=None):
+    """Вставка записей объекта full_name в ConfigDumpInfo.xml, загруженный в индекс.
+
+    Если указан source_full_name, записи (с дочерними Metadata, формами и модулями)
+    копируются с донора.
+    """
+    type_name = split_full_name(full_name)[0]
+    if index.remove_dump_entry(full_name):
+        logging.info("Удалена существующая запись метаданных")
     
-    tree.write(configuration_xml_path, encoding="UTF-8", xml_declaration=True, pretty_print=True)
-    logging.info(f"Обновлен {configuration_xml_path}")
+    had_objects = index.last_dump_entry(type_name) is not None
+    
+    donor_entries = index.dump_group(source_full_name) if source_full_name is not None else []
+    if not donor_entries and source_full_name is None:
+        # Найдём любую запись того же типа с дочерними Metadata
+        for m in index.config_versions.findall(f"{DUMP_NS}Metadata"):
+            if m.get("name") and m.get("name").startswith(f"{type_name}.") and len(list(m)) > 0:
+                donor_entries = [m]
+                break
+    try:
+        object_node = index.object_root(full_name)
+    except FileNotFoundError:
+        object_node = None
+    ids = clone_object_ids(object_node, index.object_dir(full_name), full_name)
+    for entry in build_dump_entries(full_name, donor_entries, ids, f"{DUMP_NS}Metadata"):
+        index.add_dump_entry(entry)
+    if had_objects:
+        logging.info(f"Вставлено после последней записи {type_name}.*")
+    else:
+        logging.info(f"Вставлено как первая запись {type_name}.*")
 
-def inject_into_config_dump_info(config_dump_info_path, catalog_name):
+def inject_into_config_dump_info(config_dump_info_path, catalog_name, source_name=None, type_name="Catalog"):
     logging.info("Внедрение в ConfigDumpInfo.xml")
     
-    tree = etree.parse(config_dump_info_path)
-    root = tree.getroot()
+    index = ConfigIndex(os.path.dirname(os.path.abspath(config_dump_info_path)))
+    inject_object_into_dump_info(index, f"{type_name}.{catalog_name}",
+                                 f"{type_name}.{source_name}" if source_name is not None else None)
+    index.save_dump_info()
+
+def stream_inject_into_dump_info(config_path, pairs, cache=None, only=None):
+    """Внедрение записей клонов в ConfigDumpInfo.xml потоково, без загрузки дерева в память.
+
+    pairs — пары полных имён (донор, цель). Записи целей удаляются, новые
+    строятся по записям доноров и вставляются после последней записи своего
+    типа; configVersion обновляются попутно (only — см. DumpInfoStream).
+    """
+    logging.info("Потоковое внедрение в ConfigDumpInfo.xml")
     
-    config_dump_info = root  # since root is ConfigDumpInfo
-    
-    config_versions = root.find(".//{http://v8.1c.ru/8.3/xcf/dumpinfo}ConfigVersions")
-    if config_versions is None:
-        raise ValueError("Узел ConfigVersions не найден")
-    
-    # Удаляем существующую запись метаданных, если есть
-    for meta in config_versions.findall("Metadata"):
-        if meta.get("name") == f"Catalog.{catalog_name}":
-            config_versions.remove(meta)
-            logging.info("Удалена существующая запись метаданных")
-            break
-    
-    # Находим последнюю запись метаданных Catalog.*
-    catalog_metas = [m for m in config_versions.findall("Metadata") if m.get("name").startswith("Catalog.")]
-    last_catalog_meta = catalog_metas[-1] if catalog_metas else None
-    
-    # Создаём новый узел метаданных
-    new_meta = etree.Element("{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata")
-    new_meta.set("name", f"Catalog.{catalog_name}")
-    new_meta.set("id", generate_uuid())
-    new_meta.set("configVersion", "0000000000000000000000000000000000000000")
-    # Попытаемся скопировать дочерние Metadata из оригинала (если есть), чтобы избежать дублирующих имён
-    original_meta = None
-    # Примечание: попробуем найти по любому имени Catalog.<source> в корне с дочерними элементами
-    if original_meta is None:
-        # Найдём любой Metadata для Catalog, похожий на исходник по наличию Attribute детей (предпочтительно Предметы)
-        for m in config_versions.findall("Metadata"):
-            if m.get("name") and m.get("name").startswith("Catalog.") and len(list(m)) > 0:
-                original_meta = m
-                break
-    if original_meta is not None:
-        for child in list(original_meta):
-            new_child = etree.Element("{http://v8.1c.ru/8.3/xcf/dumpinfo}Metadata")
-            # Заменяем префикс Catalog.<Old> на Catalog.<New> если присутствует
-            child_name = child.get("name") or ""
-            # Попытка извлечь название каталога из child_name
-            parts = child_name.split('.')
-            if len(parts) >= 2:
-                parts[1] = catalog_name
-            new_name = '.'.join(parts)
-            new_child.set("name", new_name)
-            new_child.set("id", generate_uuid())
-            new_meta.append(new_child)
-
-    if last_catalog_meta is not None:
-        config_versions.insert(config_versions.index(last_catalog_meta) + 1, new_meta)
-        logging.info("Вставлено после последней записи Catalog.*")
+    def build(donors):
+        entries = []
+        for source, target in pairs:
+            type_name, target_name = split_full_name(target)
+            target_path = os.path.join(config_path, TYPE_FOLDERS[type_name], f"{target_name}.xml")
+            object_node = None
+            if os.path.exists(target_path):
+                object_node = next(etree.parse(target_path).getroot().iterchildren(etree.Element), None)
+            ids = clone_object_ids(object_node, os.path.splitext(target_path)[0], target)
+            entries.extend(build_dump_entries(target, donors.get(source, []), ids, "Metadata"))
+        return entries
+    
+    stream = DumpInfoStream(config_path, drop={target for _, target in pairs},
+                            donors={source for source, _ in pairs}, build=build, cache=cache, only=only)
+    return stream.run()
+
+def read_manifest(manifest_path):
+    """Чтение манифеста пакетного клонирования.
+
+    Одна пара на строку: "Источник -> Цель" или "Источник Цель". Имена — полные
+    (Document.УчебныйДень -> Document.УчебныйДень2) или короткие: короткий источник
+    считается справочником, короткая цель получает тип источника.
+    Пустые строки и строки, начинающиеся с #, пропускаются.
+    """
+    pairs = []
+    with open(manifest_path, 'r', encoding='utf-8-sig') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = [p.strip() for p in line.split('->')] if '->' in line else line.split()
+            if len(parts) != 2 or not all(parts):
+                raise ValueError(f"Некорректная строка манифеста {manifest_path}:{line_no}: {line}")
+            pairs.append((parts[0], parts[1]))
+    if not pairs:
+        raise ValueError(f"Манифест пуст: {manifest_path}")
+    return pairs
+
+def qualify_pair(source, target, default_type="Catalog"):
+    """Пара полных имён: 'Предметы' -> 'Catalog.Предметы', цель без типа получает тип источника."""
+    if '.' not in source:
+        source = f"{default_type}.{source}"
+    if '.' not in target:
+        target = f"{split_full_name(source)[0]}.{target}"
+    return source, target
+
+def check_pairs(pairs):
+    """Пары полных имён: тип поддерживается и совпадает у донора и цели, цели не повторяются
+    и не служат источниками для других пар."""
+    for source, target in pairs:
+        source_type, target_type = split_full_name(source)[0], split_full_name(target)[0]
+        if source_type not in GENERATED_TYPES:
+            raise ValueError(f"Клонирование типа {source_type} не поддерживается "
+                             f"(поддерживаются: {', '.join(GENERATED_TYPES)})")
+        if source_type != target_type:
+            raise ValueError(f"Тип цели {target} не совпадает с типом источника {source}")
+    targets = [target for _, target in pairs]
+    duplicates = sorted({t for t in targets if targets.count(t) > 1})
+    if duplicates:
+        raise ValueError(f"Повторяющиеся цели: {', '.join(duplicates)}")
+    for source, target in pairs:
+        if source in targets:
+            raise ValueError(f"Объект {source} не может быть одновременно источником и целью")
+
+def retarget_to_clones(index, pairs, cache):
+    """Перенацелить ссылки на доноров на их клоны, переписав только файлы из индекса ссылок.
+
+    Файлы самих доноров и клонов не трогаются. Изменённые файлы отмечаются в cache,
+    чтобы их configVersion пересчитались. Возвращает полные имена их объектов.
+    """
+    config_path = index.config_path
+    # Состав объектов берётся из индекса в памяти: Configuration.xml с клонами ещё не записан
+    ref_index = ReferenceIndex(config_path, known=index.names())
+    ref_index.update()
+    owners = set()
+    for source, target in pairs:
+        with tracer.span("retarget_references", source=source, target=target):
+            changed = ref_index.retarget_references(source, split_full_name(target)[1])
+        for rel_path in changed:
+            record_touched(os.path.join(config_path, rel_path))
+            cache.mark_modified(os.path.join(config_path, rel_path))
+            owner = path_owner(rel_path)
+            if owner is not None:
+                owners.add(owner)
+        logging.info(f"Ссылки {source} -> {target}: изменено файлов {len(changed)}")
+    ref_index.save()
+    return owners
+
+def clone_objects(config_path, pairs, workers=None, link_mode='copy', deterministic_uuids=False, stream_dump_info=False,
+                  default_type="Catalog", retarget=False):
+    """Клонирование набора объектов метаданных (любых типов из GENERATED_TYPES) за один проход.
+
+    pairs — пары (источник, цель), полные или короткие имена (см. qualify_pair).
+    Configuration.xml и ConfigDumpInfo.xml читаются один раз, все клоны
+    применяются в памяти, и каждый файл записывается ровно один раз в конце.
+    stream_dump_info — не загружать ConfigDumpInfo.xml в память, а переписать его потоково.
+    retarget — после клонирования перенацелить ссылки на доноров во всей выгрузке на клоны
+    (по индексу ссылок ref_index: читаются и переписываются только ссылающиеся файлы).
+    """
+    pairs = [qualify_pair(source, target, default_type) for source, target in pairs]
+    check_pairs(pairs)
+    logging.info("Загрузка Configuration.xml и ConfigDumpInfo.xml")
+    with tracer.span("load_index"):
+        index = ConfigIndex(config_path, load_dump_info=not stream_dump_info)
+    if deterministic_uuids:
+        set_deterministic_uuids(index.config_id)
+        logging.info(f"Детерминированные UUID от конфигурации {index.config_id}")
+    for source, _ in pairs:
+        path = index.file_path(source)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Файл не найден: {path}")
+    
+    for number, (source, target) in enumerate(pairs, 1):
+        logging.info(f"[{number}/{len(pairs)}] {source} -> {target}")
+        apply_clone(index, source, target, workers, link_mode)
+    
+    # Версии проверяются только у доноров, клонов, перенацеленных объектов и Configuration:
+    # остальные файлы клон не трогает
+    only = {name for pair in pairs for name in pair}
+    cache = DigestCache(config_path)
+    if retarget:
+        only |= retarget_to_clones(index, pairs, cache)
+    
+    if stream_dump_info:
+        with tracer.span("save_configuration"):
+            index.save_configuration()
+        with tracer.span("stream_dump_info"):
+            stream_inject_into_dump_info(config_path, pairs, cache, only)
+            cache.save()
+        record_touched(index.configuration_path, index.dump_info_path)
     else:
-        config_versions.append(new_meta)
-        logging.info("Вставлено как первая запись Catalog.*")
+        save_clone_results(index, cache, only)
+
+def apply_clone(index, source, target, workers=None, link_mode='copy', clone_dir=True):
+    """Четыре фазы клонирования одной пары полных имён над загруженным индексом (без записи корневых файлов).
+
+    clone_dir=False — папка цели не удаляется и не клонируется заново (изменился только файл объекта).
+    """
+    config_path = index.config_path
+    type_name, source_name = split_full_name(source)
+    target_name = split_full_name(target)[1]
+    
+    # Фаза 1: Удаление существующих метаданных
+    if clone_dir:
+        with tracer.span("remove_existing_metadata", target=target):
+            remove_existing_metadata(config_path, target_name, type_name)
+    
+    # Фаза 2: Клонирование метаданных
+    with tracer.span("clone_object_metadata", source=source, target=target):
+        clone_object_metadata(index.file_path(source), index.file_path(target), source_name, target_name,
+                              workers, link_mode, clone_dir, type_name)
     
-    tree.write(config_dump_info_path, encoding="UTF-8", xml_declaration=True, pretty_print=True)
-    logging.info(f"Обновлен {config_dump_info_path}")
+    # Фаза 3: Внедрение в Configuration.xml (в памяти)
+    with tracer.span("inject_configuration", target=target):
+        inject_object_into_configuration(index, target)
+    
+    # Фаза 4: Внедрение в ConfigDumpInfo.xml (в памяти; при потоковой обработке — позже, одним проходом)
+    if index.dump_tree is not None:
+        with tracer.span("inject_dump_info", target=target):
+            inject_object_into_dump_info(index, target, source)
+    index.forget_object(target)
+
+def save_clone_results(index, cache=None, only=None):
+    """Записать Configuration.xml, пересчитать configVersion и записать ConfigDumpInfo.xml.
+
+    only — полные имена объектов, версии которых нужно проверить (None — все записи).
+    """
+    config_path = index.config_path
+    # Configuration.xml пишется до подсчёта версий, чтобы его запись получила итоговый хэш
+    with tracer.span("save_configuration"):
+        index.save_configuration()
+    
+    # Версии записей ConfigDumpInfo по содержимому изменённых файлов
+    with tracer.span("update_config_versions"):
+        if cache is None:
+            cache = DigestCache(config_path)
+        update_config_versions(config_path, index.dump_tree.getroot(), cache, only)
+    
+    with tracer.span("save_dump_info"):
+        index.save_dump_info()
+        cache.save()
+    record_touched(index.configuration_path, index.dump_info_path)
 
 def main():
-    parser = argparse.ArgumentParser(description="Клонирование каталога в 1C конфигурации.")
+    parser = argparse.ArgumentParser(description="Клонирование объектов метаданных (справочников, документов, регистров, отчётов) в 1C конфигурации.")
     parser.add_argument('--config-path', default=os.getcwd(), help='Путь к конфигурации (по умолчанию текущая директория)')
-    parser.add_argument('--source', default='Предметы', help='Исходный каталог для клонирования')
-    parser.add_argument('--target', default='УТО_Тест', help='Целевой каталог')
+    parser.add_argument('--source', default='Предметы', help='Исходный объект для клонирования (Имя или Тип.Имя)')
+    parser.add_argument('--target', default='УТО_Тест', help='Целевой объект (Имя или Тип.Имя)')
+    parser.add_argument('--type', dest='default_type', choices=sorted(GENERATED_TYPES), default='Catalog',
+                        help='Тип метаданных для коротких имён в --source и манифесте (по умолчанию Catalog)')
+    parser.add_argument('--manifest', help='Файл с парами "Источник -> Цель" для пакетного клонирования (заменяет --source/--target)')
+    parser.add_argument('--workers', type=int, help='Число процессов для замены имён в папке объекта (1 — без пула)')
+    parser.add_argument('--link-mode', choices=['copy', 'reflink', 'hardlink', 'auto'], default='copy',
+                        help='Как переносить файлы папки объекта без вхождений имени: copy, reflink, hardlink или auto (reflink -> hardlink -> copy). '
+                             'При hardlink файл клона и донора — один и тот же файл: правка любого из них на месте '
+                             '(например, в редакторе) меняет оба; файлы, которые переписывает сам клонировщик, отвязываются')
+    parser.add_argument('--retarget', action='store_true',
+                        help='Перенацелить ссылки на источник во всей выгрузке на клон (по индексу ссылок .refindex.json)')
+    parser.add_argument('--list-file', help='Записать список изменённых файлов для частичной загрузки (-listFile ... -partial)')
+    parser.add_argument('--deterministic-uuids', action='store_true',
+                        help='Выводить UUID из UUID конфигурации, имени цели и пути узла (повторный запуск даёт тот же результат)')
+    parser.add_argument('--stream-dump-info', action='store_true',
+                        help='Обрабатывать ConfigDumpInfo.xml потоково, без загрузки в память (для очень больших конфигураций)')
+    parser.add_argument('--trace', metavar='out.json', help='Сохранить трассировку фаз в формате Chrome Trace Event (chrome://tracing, Perfetto)')
+    parser.add_argument('--profile', action='store_true', help='Вывести сводку по фазам и самые затратные функции (cProfile)')
     parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
 
     args = parser.parse_args()
     setup_logging(args.verbose)
+    if args.trace or args.profile:
+        tracer.enable()
+    profiler = cProfile.Profile() if args.profile else None
     
     try:
         print("\n╔════════════════════════════════════════════════════════════════╗")
@@ -223,31 +817,26 @@ def main():
         print("╚════════════════════════════════════════════════════════════════╝")
         
         config_path = args.config_path
-        source_catalog = args.source
-        target_catalog = args.target
-        
-        # Пути
-        source_catalog_path = os.path.join(config_path, "Catalogs", f"{source_catalog}.xml")
-        target_catalog_path = os.path.join(config_path, "Catalogs", f"{target_catalog}.xml")
-        configuration_xml_path = os.path.join(config_path, "Configuration.xml")
-        config_dump_info_path = os.path.join(config_path, "ConfigDumpInfo.xml")
-        
-        # Проверки
-        for path in [source_catalog_path, configuration_xml_path, config_dump_info_path]:
-            if not os.path.exists(path):
-                raise FileNotFoundError(f"Файл не найден: {path}")
-        
-        # Фаза 1: Удаление существующих метаданных
-        remove_existing_metadata(config_path, target_catalog)
-        
-        # Фаза 2: Клонирование метаданных
-        clone_catalog_metadata(source_catalog_path, target_catalog_path, source_catalog, target_catalog)
-        
-        # Фаза 3: Внедрение в Configuration.xml
-        inject_into_configuration(configuration_xml_path, target_catalog)
+        if args.manifest:
+            pairs = read_manifest(args.manifest)
+        else:
+            pairs = [(args.source, args.target)]
         
-        # Фаза 4: Внедрение в ConfigDumpInfo.xml
-        inject_into_config_dump_info(config_dump_info_path, target_catalog)
+        if profiler:
+            profiler.enable()
+        with tracer.span("clone_objects", cat="run", pairs=len(pairs)):
+            clone_objects(config_path, pairs, args.workers, args.link_mode, args.deterministic_uuids, args.stream_dump_info,
+                          args.default_type, args.retarget)
+        if profiler:
+            profiler.disable()
+        if args.list_file:
+            write_partial_load_list(args.list_file, config_path)
+        if args.trace:
+            tracer.save(args.trace)
+        if args.profile:
+            tracer.print_summary()
+            print("\nСамые затратные функции (накопленное время):")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
         
         print("\n╔════════════════════════════════════════════════════════════════╗")
         print("║  ХИРУРГИЧЕСКОЕ ВНЕДРЕНИЕ ЗАВЕРШЕНО - ГОТОВО К ЗАГРУЗКЕ        ║")
@@ -255,7 +844,11 @@ def main():
         
         print("\nСледующие шаги:")
         print("1. Создайте базу: 1cv8 CREATEINFOBASE File=\"<путь>\"")
-        print("2. Загрузите конфигурацию: 1cv8 DESIGNER /F <путь> /LoadConfigFromFiles \"{}\" /UpdateDBCfg".format(config_path))
+        if args.list_file:
+            print("2. Загрузите изменённые объекты: 1cv8 DESIGNER /F <путь> /LoadConfigFromFiles \"{}\" -listFile \"{}\" -Format Hierarchical -partial /UpdateDBCfg".format(
+                config_path, os.path.abspath(args.list_file)))
+        else:
+            print("2. Загрузите конфигурацию: 1cv8 DESIGNER /F <путь> /LoadConfigFromFiles \"{}\" /UpdateDBCfg".format(config_path))
         
     except Exception as e:
         logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Индекс выгрузки конфигурации 1C в памяти.
+Загружает Configuration.xml и ConfigDumpInfo.xml один раз и даёт поиск за O(1)
+по полному имени объекта метаданных (Тип.Имя) и по UUID.
+Файлы объектов разбираются лениво, при первом обращении.
+"""
+
+import os
+import logging
+from lxml import etree
+
+from xml_writer import parse_xml, write_xml
+
+MD_NS = "{http://v8.1c.ru/8.3/MDClasses}"
+XR_NS = "{http://v8.1c.ru/8.3/xcf/readable}"
+DUMP_NS = "{http://v8.1c.ru/8.3/xcf/dumpinfo}"
+
+# Тип метаданных -> папка выгрузки
+TYPE_FOLDERS = {
+    "Language": "Languages",
+    "CommonModule": "CommonModules",
+    "CommonForm": "CommonForms",
+    "Catalog": "Catalogs",
+    "Document": "Documents",
+    "Report": "Reports",
+    "InformationRegister": "InformationRegisters",
+    "AccumulationRegister": "AccumulationRegisters",
+}
+
+# Порядок типов в ChildObjects Configuration.xml (так их выгружает Designer)
+CHILD_OBJECTS_ORDER = [
+    "Language", "Subsystem", "StyleItem", "Style", "CommonPicture", "SessionParameter", "Role", "CommonTemplate",
+    "FilterCriterion", "CommonModule", "CommonAttribute", "ExchangePlan", "XDTOPackage", "WebService", "HTTPService",
+    "WSReference", "EventSubscription", "ScheduledJob", "SettingsStorage", "FunctionalOption",
+    "FunctionalOptionsParameter", "DefinedType", "CommonCommand", "CommandGroup", "Constant", "CommonForm",
+    "Catalog", "Document", "DocumentNumerator", "Sequence", "DocumentJournal", "Enum", "Report", "DataProcessor",
+    "InformationRegister", "AccumulationRegister", "ChartOfCharacteristicTypes", "ChartOfAccounts",
+    "AccountingRegister", "ChartOfCalculationTypes", "CalculationRegister", "BusinessProcess", "Task",
+]
+
+# Типы, которые умеет клонировать clone_catalog_linux.py: тип -> категории сгенерированных
+# типов (GeneratedType <Тип><Категория>.Имя в InternalInfo). Для табличных частей
+# документа дополнительно генерируются <Тип>TabularSection(Row).Имя.<Часть>.
+GENERATED_TYPES = {
+    "Catalog": ("Object", "Ref", "Selection", "List", "Manager"),
+    "Document": ("Object", "Ref", "Selection", "List", "Manager"),
+    "Report": ("Object", "Manager"),
+    "InformationRegister": ("Record", "Manager", "Selection", "List", "RecordSet", "RecordKey", "RecordManager"),
+    "AccumulationRegister": ("Record", "Manager", "Selection", "List", "RecordSet", "RecordKey"),
+}
+
+def split_full_name(full_name):
+    """'Catalog.Предметы' -> ('Catalog', 'Предметы')."""
+    type_name, _, name = full_name.partition('.')
+    if not name:
+        raise ValueError(f"Ожидалось полное имя вида Тип.Имя: {full_name}")
+    return type_name, name
+
+def object_full_name(entry_name):
+    """Объект, к которому относится запись ConfigDumpInfo: 'Document.X.Form.Y.Form' -> 'Document.X'."""
+    return '.'.join(entry_name.split('.', 2)[:2])
+
+class ConfigIndex:
+    """Индекс объектов выгрузки: имя -> файл, узел ChildObjects, запись ConfigDumpInfo, UUID."""
+
+    def __init__(self, config_path, load_dump_info=True):
+        """load_dump_info=False — не загружать ConfigDumpInfo.xml (его обрабатывают потоково)."""
+        self.config_path = config_path
+        self.configuration_path = os.path.join(config_path, "Configuration.xml")
+        self.dump_info_path = os.path.join(config_path, "ConfigDumpInfo.xml")
+
+        for path in [self.configuration_path, self.dump_info_path]:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Файл не найден: {path}")
+
+        # Исходные байты нужны для записи с минимальным диффом
+        self.configuration_tree, self._configuration_bytes = parse_xml(self.configuration_path)
+        self.dump_tree = self._dump_bytes = self.config_versions = None
+        if load_dump_info:
+            self.dump_tree, self._dump_bytes = parse_xml(self.dump_info_path)
+
+        self.child_objects = self.configuration_tree.getroot().find(f".//{MD_NS}ChildObjects")
+        if self.child_objects is None:
+            raise ValueError("Узел ChildObjects не найден в Configuration.xml")
+        if self.dump_tree is not None:
+            self.config_versions = self.dump_tree.getroot().find(f"{DUMP_NS}ConfigVersions")
+            if self.config_versions is None:
+                raise ValueError("Узел ConfigVersions не найден в ConfigDumpInfo.xml")
+
+        self._child_nodes = {}       # Тип.Имя -> [узлы ChildObjects]
+        self._last_child = {}        # Тип -> последний узел ChildObjects этого типа
+        self._dump_entries = {}      # полное имя -> [узлы Metadata] (на всех уровнях)
+        self._dump_groups = {}       # Тип.Имя -> [корневые записи объекта: Тип.Имя, Тип.Имя.Form.X, ...]
+        self._last_dump_entry = {}   # Тип -> последняя корневая запись объекта этого типа
+        self._objects = {}           # Тип.Имя -> разобранное дерево файла объекта
+        self._uuid_owners = None     # uuid -> (Тип.Имя, вид), строится по требованию
+
+        for node in self.child_objects:
+            if not isinstance(node.tag, str):
+                continue
+            type_name = etree.QName(node).localname
+            self._child_nodes.setdefault(f"{type_name}.{node.text}", []).append(node)
+            self._last_child[type_name] = node
+
+        for meta in (self.config_versions.iter(f"{DUMP_NS}Metadata") if self.config_versions is not None else []):
+            name = meta.get("name") or ""
+            self._dump_entries.setdefault(name, []).append(meta)
+            if meta.getparent() is self.config_versions and '.' in name:
+                self._dump_groups.setdefault(object_full_name(name), []).append(meta)
+                self._last_dump_entry[name.split('.', 1)[0]] = meta
+
+        logging.debug(f"Индекс: {len(self._child_nodes)} объектов, {len(self._dump_entries)} записей ConfigDumpInfo")
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    @property
+    def config_id(self):
+        """UUID самой конфигурации (атрибут uuid узла Configuration)."""
+        node = self.configuration_tree.getroot().find(f"{MD_NS}Configuration")
+        return node.get("uuid") if node is not None else None
+
+    def names(self, type_name=None):
+        """Полные имена объектов из ChildObjects (опционально одного типа)."""
+        if type_name is None:
+            return list(self._child_nodes)
+        prefix = f"{type_name}."
+        return [name for name in self._child_nodes if name.startswith(prefix)]
+
+    def __contains__(self, full_name):
+        return full_name in self._child_nodes
+
+    def file_path(self, full_name):
+        """Путь к XML-файлу объекта: <Папка>/<Имя>.xml."""
+        type_name, name = split_full_name(full_name)
+        folder = TYPE_FOLDERS.get(type_name)
+        if folder is None:
+            raise ValueError(f"Неизвестный тип метаданных: {type_name}")
+        return os.path.join(self.config_path, folder, f"{name}.xml")
+
+    def object_dir(self, full_name):
+        """Путь к папке объекта (формы, модули, макеты)."""
+        return os.path.splitext(self.file_path(full_name))[0]
+
+    def child_node(self, full_name):
+        nodes = self._child_nodes.get(full_name)
+        return nodes[-1] if nodes else None
+
+    def last_child_node(self, type_name):
+        return self._last_child.get(type_name)
+
+    def dump_entry(self, full_name):
+        entries = self._dump_entries.get(full_name)
+        return entries[-1] if entries else None
+
+    def dump_group(self, full_name):
+        """Корневые записи объекта в порядке файла: сама запись и записи форм, модулей, макетов."""
+        return list(self._dump_groups.get(full_name, []))
+
+    def last_dump_entry(self, type_name):
+        return self._last_dump_entry.get(type_name)
+
+    def object_root(self, full_name):
+        """Корневой элемент объекта (Catalog, Document, ...), файл разбирается при первом обращении."""
+        tree = self._objects.get(full_name)
+        if tree is None:
+            path = self.file_path(full_name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Файл не найден: {path}")
+            tree = etree.parse(path)
+            self._objects[full_name] = tree
+        root = tree.getroot()
+        for child in root:
+            if isinstance(child.tag, str):
+                return child
+        return None
+
+    def object_uuids(self, full_name):
+        """Все UUID объекта: список (uuid, вид), где вид — uuid, TypeId или ValueId."""
+        result = []
+        for node in self.object_root(full_name).iter():
+            if not isinstance(node.tag, str):
+                continue
+            if node.get("uuid"):
+                result.append((node.get("uuid"), "uuid"))
+            elif node.tag == f"{XR_NS}TypeId" and node.text:
+                result.append((node.text.strip(), "TypeId"))
+            elif node.tag == f"{XR_NS}ValueId" and node.text:
+                result.append((node.text.strip(), "ValueId"))
+        return result
+
+    def uuid_owner(self, value):
+        """Объект и вид узла, которому принадлежит UUID, или None."""
+        if self._uuid_owners is None:
+            self._uuid_owners = {}
+            for full_name in self._child_nodes:
+                try:
+                    uuids = self.object_uuids(full_name)
+                except (FileNotFoundError, ValueError):
+                    continue
+                for uuid_value, kind in uuids:
+                    self._uuid_owners.setdefault(uuid_value, (full_name, kind))
+        return self._uuid_owners.get(value)
+
+    # ------------------------------------------------------------------
+    # Изменение (индекс остаётся согласованным с деревьями)
+    # ------------------------------------------------------------------
+
+    def forget_object(self, full_name):
+        """Сбросить закэшированное дерево объекта (например, после перезаписи файла)."""
+        self._objects.pop(full_name, None)
+        self._uuid_owners = None
+
+    @staticmethod
+    def _remove_keeping_indent(node):
+        """Удалить узел; хвост последнего узла (отступ закрывающего тега родителя) переходит к предыдущему."""
+        prev = node.getprevious()
+        if node.getnext() is None and node.tail and prev is not None:
+            prev.tail = node.tail
+        node.getparent().remove(node)
+
+    def remove_child(self, full_name):
+        """Удалить все ссылки на объект из ChildObjects. Возвращает число удалённых узлов."""
+        nodes = self._child_nodes.pop(full_name, [])
+        type_name = split_full_name(full_name)[0]
+        last = self._last_child.get(type_name)
+        for node in nodes:
+            if node is last:
+                # Новый последний узел типа — ближайший предыдущий сосед того же типа
+                prev = node.getprevious()
+                while prev is not None and (not isinstance(prev.tag, str) or prev.tag != node.tag or prev in nodes):
+                    prev = prev.getprevious()
+                if prev is None:
+                    self._last_child.pop(type_name, None)
+                else:
+                    self._last_child[type_name] = prev
+                last = self._last_child.get(type_name)
+            self._remove_keeping_indent(node)
+        return len(nodes)
+
+    def add_child(self, full_name, before_type=None):
+        """Добавить ссылку на объект после последнего узла того же типа.
+
+        Если узлов этого типа нет, узел вставляется перед первым узлом before_type,
+        а без него — перед первым узлом типа, идущего позже по CHILD_OBJECTS_ORDER
+        (или в конец ChildObjects). Возвращает созданный узел.
+        """
+        type_name, name = split_full_name(full_name)
+        node = etree.Element(f"{MD_NS}{type_name}")
+        node.text = name
+        last = self._last_child.get(type_name)
+        if last is not None:
+            node.tail = last.tail
+            if last.getnext() is None:
+                # Хвост последнего узла — отступ закрывающего тега, он переходит к новому
+                prev = last.getprevious()
+                last.tail = prev.tail if prev is not None else self.child_objects.text
+            last.addnext(node)
+        else:
+            anchor = None
+            if before_type:
+                anchor = self.child_objects.find(f"{MD_NS}{before_type}")
+            elif type_name in CHILD_OBJECTS_ORDER:
+                later = set(CHILD_OBJECTS_ORDER[CHILD_OBJECTS_ORDER.index(type_name) + 1:])
+                anchor = next((node for node in self.child_objects
+                               if isinstance(node.tag, str) and etree.QName(node).localname in later), None)
+            if anchor is not None:
+                node.tail = anchor.tail
+                anchor.addprevious(node)
+            else:
+                self.child_objects.append(node)
+        self._child_nodes.setdefault(full_name, []).append(node)
+        self._last_child[type_name] = node
+        return node
+
+    def remove_dump_entry(self, full_name):
+        """Удалить корневые записи объекта (его запись и записи форм, модулей, макетов) вместе с дочерними.
+
+        Возвращает число удалённых корневых записей.
+        """
+        entries = [e for e in self._dump_groups.pop(full_name, []) if e.getparent() is self.config_versions]
+        type_name = split_full_name(full_name)[0]
+        last = self._last_dump_entry.get(type_name)
+        for entry in entries:
+            for meta in entry.iter(f"{DUMP_NS}Metadata"):
+                siblings = self._dump_entries.get(meta.get("name") or "", [])
+                if meta in siblings:
+                    siblings.remove(meta)
+                    if not siblings:
+                        del self._dump_entries[meta.get("name") or ""]
+        if last is not None and last in entries:
+            # Новая последняя запись типа — ближайшая предыдущая запись того же типа вне удаляемых
+            prev = last.getprevious()
+            while prev is not None and not ((prev.get("name") or "").startswith(f"{type_name}.") and prev not in entries):
+                prev = prev.getprevious()
+            if prev is None:
+                self._last_dump_entry.pop(type_name, None)
+            else:
+                self._last_dump_entry[type_name] = prev
+        for entry in entries:
+            self._remove_keeping_indent(entry)
+        return len(entries)
+
+    def add_dump_entry(self, entry):
+        """Вставить готовую корневую запись Metadata после последней записи того же типа."""
+        full_name = entry.get("name")
+        type_name = split_full_name(full_name)[0]
+        last = self._last_dump_entry.get(type_name)
+        if last is not None:
+            entry.tail = last.tail
+            if last.getnext() is None:
+                prev = last.getprevious()
+                last.tail = prev.tail if prev is not None else self.config_versions.text
+            last.addnext(entry)
+        else:
+            self.config_versions.append(entry)
+        for meta in entry.iter(f"{DUMP_NS}Metadata"):
+            self._dump_entries.setdefault(meta.get("name") or "", []).append(meta)
+        self._dump_groups.setdefault(object_full_name(full_name), []).append(entry)
+        self._last_dump_entry[type_name] = entry
+        return entry
+
+    def changed_on_disk(self):
+        """Изменены ли Configuration.xml или ConfigDumpInfo.xml кем-то другим после загрузки или записи."""
+        for path, data in [(self.configuration_path, self._configuration_bytes), (self.dump_info_path, self._dump_bytes)]:
+            if data is None:
+                continue
+            try:
+                if os.path.getsize(path) != len(data):
+                    return True
+                with open(path, 'rb') as f:
+                    if f.read() != data:
+                        return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def save_configuration(self):
+        self._configuration_bytes = write_xml(self.configuration_path, self.configuration_tree, self._configuration_bytes)
+        logging.info(f"Обновлен {self.configuration_path}")
+
+    def save_dump_info(self):
+        if self.dump_tree is None:
+            return
+        self._dump_bytes = write_xml(self.dump_info_path, self.dump_tree, self._dump_bytes)
+        logging.info(f"Обновлен {self.dump_info_path}")
+
+    def save(self):
+        """Записать Configuration.xml и ConfigDumpInfo.xml."""
+        self.save_configuration()
+        self.save_dump_info()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Инкрементальное обслуживание ConfigDumpInfo.xml.
+Для каждой записи с configVersion определяет файлы объекта или подчинённого
+объекта (формы, макета, модуля), считает хэш их содержимого и обновляет
+configVersion только у записей, файлы которых изменились с прошлого запуска.
+Хэши файлов кэшируются на диске (mtime, размер, хэш содержимого).
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import logging
+import tempfile
+from lxml import etree
+
+from config_index import TYPE_FOLDERS, DUMP_NS, object_full_name
+from instrumentation import tracer
+from xml_writer import parse_xml, write_xml, write_atomic
+
+CACHE_FILE_NAME = ".dumpinfo-cache.json"
+CACHE_VERSION = 1
+
+# configVersion новых записей, которым ещё не посчитана версия
+EMPTY_CONFIG_VERSION = "0" * 40
+
+# Теги записей в байтах ConfigDumpInfo.xml (значения атрибутов не содержат '>')
+METADATA_TAG = re.compile(rb'<(/?)Metadata\b([^>]*?)(/?)>')
+TAG_ATTRIBUTE = re.compile(rb'\s([\w:]+)="([^"]*)"')
+
+# Размер блока чтения при потоковой обработке
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Вид подчинённого объекта в имени записи -> папка в выгрузке
+SUBOBJECT_FOLDERS = {
+    "Form": "Forms",
+    "Template": "Templates",
+    "Command": "Commands",
+}
+
+def ext_files(object_dir, leaf):
+    """Файлы Ext/<leaf>.* и содержимое папки Ext/<leaf>/ (например, Form.xml и Form/Module.bsl)."""
+    ext_dir = os.path.join(object_dir, "Ext")
+    files = []
+    if os.path.isdir(ext_dir):
+        for entry in os.scandir(ext_dir):
+            if entry.is_file() and os.path.splitext(entry.name)[0] == leaf:
+                files.append(entry.path)
+    leaf_dir = os.path.join(ext_dir, leaf)
+    for root, dirs, names in os.walk(leaf_dir):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+def entry_files(config_path, name):
+    """Файлы выгрузки, из которых состоит запись ConfigDumpInfo с данным именем.
+
+    Catalog.X -> Catalogs/X.xml; Document.X.Form.F -> Documents/X/Forms/F.xml;
+    Document.X.Form.F.Form -> Documents/X/Forms/F/Ext/Form.xml и Form/Module.bsl;
+    Document.X.ObjectModule -> Documents/X/Ext/ObjectModule.bsl;
+    Configuration.X.Y -> Ext/Y.*.
+    """
+    parts = name.split('.')
+    if len(parts) < 2:
+        return []
+    if parts[0] == "Configuration":
+        if len(parts) == 2:
+            return [os.path.join(config_path, "Configuration.xml")]
+        return ext_files(config_path, parts[2])
+    folder = TYPE_FOLDERS.get(parts[0])
+    if folder is None:
+        return []
+    path = os.path.join(config_path, folder, parts[1])
+    rest = parts[2:]
+    while len(rest) >= 2:
+        path = os.path.join(path, SUBOBJECT_FOLDERS.get(rest[0], rest[0] + "s"), rest[1])
+        rest = rest[2:]
+    if not rest:
+        return [path + ".xml"] if os.path.isfile(path + ".xml") else []
+    return ext_files(path, rest[0])
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    tracer.add(files_read=1, bytes_read=os.path.getsize(path))
+    return digest.hexdigest()
+
+def content_version(config_path, files, digests):
+    """configVersion из хэшей файлов: 32 hex-символа хэша и 8 нулей, как у Designer."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in files:
+        digest.update(os.path.relpath(path, config_path).replace(os.sep, '/').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(digests[path].encode('ascii'))
+    return digest.hexdigest() + "00000000"
+
+class DigestCache:
+    """Кэш хэшей содержимого файлов, проверяемый по mtime и размеру."""
+
+    def __init__(self, config_path, cache_path=None):
+        self.config_path = config_path
+        self.cache_path = cache_path or os.path.join(config_path, CACHE_FILE_NAME)
+        self.files = {}
+        self.existed = False
+        self.dirty = False
+        # Файлы, изменённые в этом запуске самим инструментом (отн. пути): версии их записей
+        # пересчитываются и при первом запуске, когда кэша ещё нет
+        self.modified = set()
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.files = data.get("files", {})
+                    self.existed = True
+            except (OSError, ValueError) as e:
+                logging.warning(f"Не удалось прочитать кэш хэшей {self.cache_path}: {e}")
+
+    def digest(self, path):
+        """Возвращает (хэш, изменился ли файл с прошлого запуска)."""
+        rel_path = os.path.relpath(path, self.config_path)
+        stat = os.stat(path)
+        cached = self.files.get(rel_path)
+        if cached is not None and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["digest"], False
+        digest = file_digest(path)
+        changed = cached is None or cached["digest"] != digest
+        self.files[rel_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "digest": digest}
+        self.dirty = True
+        return digest, changed
+
+    def mark_modified(self, path):
+        self.modified.add(os.path.relpath(path, self.config_path))
+
+    def save(self):
+        """Записать кэш, если с загрузки в нём что-то изменилось."""
+        if not self.dirty:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "files": self.files}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+def refresh_version(config_path, name, version, cache, stats):
+    """Новая configVersion записи name (или прежняя, если пересчитывать не нужно); обновляет stats."""
+    stats["entries"] += 1
+    files = entry_files(config_path, name)
+    if not files:
+        stats["missing"] += 1
+        logging.debug(f"Нет файлов для записи {name}")
+        return version
+    digests = {}
+    changed = False
+    for path in files:
+        digests[path], file_changed = cache.digest(path)
+        changed = changed or file_changed
+    stats["files_hashed"] += len(files)
+    forced = bool(cache.modified) and any(os.path.relpath(path, config_path) in cache.modified for path in files)
+    if version == EMPTY_CONFIG_VERSION or (changed and cache.existed) or forced:
+        new_version = content_version(config_path, files, digests)
+        if new_version != version:
+            stats["updated"] += 1
+            logging.debug(f"configVersion {name}: {new_version}")
+            return new_version
+    return version
+
+def version_filter(only):
+    """Предикат «проверять ли версию записи» для набора полных имён объектов (None — все записи).
+
+    Проверяются записи самих объектов, их подчинённые записи и записи Configuration.
+    """
+    if only is None:
+        return lambda name: True
+    only = set(only)
+    prefixes = tuple(f"{name}." for name in only) + ("Configuration.",)
+    return lambda name: name in only or name.startswith(prefixes)
+
+def update_config_versions(config_path, dump_root, cache=None, only=None):
+    """Обновление configVersion в дереве ConfigDumpInfo.xml.
+
+    Версия пересчитывается у записей, чьи файлы изменились с прошлого запуска,
+    и у новых записей с нулевой версией. При первом запуске (кэша ещё нет)
+    версии Designer сохраняются, а кэш лишь заполняется.
+    only — полные имена объектов (Catalog.X): проверяются только их записи,
+    подчинённые записи и запись Configuration.
+    Возвращает статистику: entries, updated, files_hashed, missing.
+    """
+    if cache is None:
+        cache = DigestCache(config_path)
+    selected = version_filter(only)
+    stats = {"entries": 0, "updated": 0, "files_hashed": 0, "missing": 0}
+    for meta in dump_root.iter(f"{DUMP_NS}Metadata"):
+        version = meta.get("configVersion")
+        if version is None:
+            continue
+        name = meta.get("name") or ""
+        if not selected(name):
+            continue
+        new_version = refresh_version(config_path, name, version, cache, stats)
+        if new_version != version:
+            meta.set("configVersion", new_version)
+    logging.info(f"ConfigDumpInfo: записей {stats['entries']}, обновлено версий {stats['updated']}, "
+                 f"без файлов {stats['missing']}")
+    return stats
+
+class DumpInfoStream:
+    """Потоковая перезапись ConfigDumpInfo.xml без построения дерева.
+
+    Файл читается блоками, теги Metadata находятся регулярным выражением, всё
+    остальное копируется байт в байт. drop и donors — полные имена объектов (Тип.Имя):
+    корневые записи объектов из drop (сама запись и записи форм, модулей, макетов)
+    удаляются вместе с хвостовыми пробелами, записи объектов из donors запоминаются
+    (последняя по имени) как элементы lxml без пространства имён, configVersion
+    обновляются как в update_config_versions (only — как там же; по умолчанию только записи
+    удаляемых объектов, доноров и Configuration). Новые записи (build({объект: [записи]})
+    -> [элементы]) вставляются после последней корневой записи своего типа. В памяти
+    одновременно находятся только блок чтения и записи-доноры, независимо от размера файла.
+    """
+
+    def __init__(self, config_path, drop=(), donors=(), build=None, cache=None, chunk_size=STREAM_CHUNK_SIZE,
+                 only=None):
+        self.config_path = config_path
+        self.path = os.path.join(config_path, "ConfigDumpInfo.xml")
+        self.drop = set(drop)
+        self.donors = set(donors)
+        self.build = build
+        self.selected = version_filter(self.drop | self.donors if only is None else only)
+        self.cache = cache if cache is not None else DigestCache(config_path)
+        self.chunk_size = chunk_size
+        self.stats = {"entries": 0, "updated": 0, "files_hashed": 0, "missing": 0, "dropped": 0, "inserted": 0}
+        self.donor_entries = {}   # объект -> {имя записи: элемент}
+
+    def run(self):
+        """Перезаписать файл. Возвращает статистику."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ConfigDumpInfo.xml.', suffix='.stream')
+        try:
+            with os.fdopen(fd, 'w+b') as out:
+                self._out = out
+                self._depth = 0
+                self._skip_depth = None   # глубина удаляемой записи
+                self._skip_tail = False   # пропустить пробелы после удалённой записи
+                self._skipped = b''       # пропущенные пробелы (нужны, если за удалённой записью конец списка)
+                self._drop_spacing = None # пробелы перед удалёнными подряд записями
+                self._top_name = None
+                self._capture = None      # байты текущей записи-донора
+                self._insert_ends = {}    # тип -> конец последней записи этого типа в выходном файле
+                self._last_end = None     # конец последней корневой записи
+                self._spacing = b''       # пробелы в конце выходного файла
+                self._indent = None       # отступ между корневыми записями
+                with open(self.path, 'rb') as src:
+                    buffer = b''
+                    while True:
+                        chunk = src.read(self.chunk_size)
+                        buffer += chunk
+                        # Тег, начавшийся до последнего '>', целиком лежит в обработанной части
+                        limit = len(buffer) if not chunk else buffer.rfind(b'>') + 1
+                        pos = 0
+                        for match in METADATA_TAG.finditer(buffer, 0, limit):
+                            self._text(buffer[pos:match.start()])
+                            self._tag(match)
+                            pos = match.end()
+                        self._text(buffer[pos:limit])
+                        buffer = buffer[limit:]
+                        if not chunk:
+                            break
+                out.flush()
+                self._finish(out)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logging.info(f"ConfigDumpInfo (потоково): записей {self.stats['entries']}, обновлено версий {self.stats['updated']}, "
+                     f"удалено {self.stats['dropped']}, вставлено {self.stats['inserted']}")
+        return self.stats
+
+    def _write(self, data):
+        self._out.write(data)
+        if self._capture is not None:
+            self._capture += data
+        stripped = data.rstrip(b' \t\r\n')
+        self._spacing = self._spacing + data if not stripped else data[len(stripped):]
+        self._drop_spacing = None
+
+    def _text(self, data):
+        if self._skip_depth is not None or not data:
+            return
+        if self._skip_tail:
+            stripped = data.lstrip(b' \t\r\n')
+            if not stripped:
+                self._skipped += data
+                return
+            self._skip_tail = False
+            if stripped.startswith(b'</') and (self._skipped or len(stripped) != len(data)):
+                # Удалены последние записи: их хвост — отступ закрывающего тега, а отступ перед ними лишний
+                self._out.seek(self._out.tell() - len(self._drop_spacing))
+                self._out.truncate()
+                data = self._skipped + data
+            else:
+                data = stripped
+        self._write(data)
+
+    def _tag(self, match):
+        closing, attributes, self_closing = match.group(1), match.group(2), match.group(3)
+        if closing:
+            self._depth -= 1
+            if self._skip_depth is not None:
+                if self._depth == self._skip_depth:
+                    self._skip_depth = None
+                    self._skip_tail = True
+                return
+            self._write(match.group(0))
+            if self._depth == 0:
+                self._end_top()
+            return
+        if self._skip_depth is not None:
+            if not self_closing:
+                self._depth += 1
+            return
+        self._skip_tail = False
+        self._skipped = b''
+        values = {key.decode(): value.decode('utf-8') for key, value in TAG_ATTRIBUTE.findall(attributes)}
+        name = values.get("name", "")
+        if self._depth == 0:
+            self._top_name = name
+            if self._indent is None and self._spacing:
+                self._indent = self._spacing
+            if object_full_name(name) in self.drop:
+                self.stats["dropped"] += 1
+                if self._drop_spacing is None:
+                    self._drop_spacing = self._spacing
+                if self_closing:
+                    self._skip_tail = True
+                else:
+                    self._skip_depth = self._depth
+                    self._depth += 1
+                return
+            if object_full_name(name) in self.donors:
+                self._capture = bytearray()
+        token = match.group(0)
+        version = values.get("configVersion")
+        if version is not None and self.selected(name):
+            new_version = refresh_version(self.config_path, name, version, self.cache, self.stats)
+            if new_version != version:
+                token = token.replace(f'configVersion="{version}"'.encode(), f'configVersion="{new_version}"'.encode())
+        self._write(token)
+        if self_closing:
+            if self._depth == 0:
+                self._end_top()
+        else:
+            self._depth += 1
+
+    def _end_top(self):
+        if self._capture is not None:
+            entries = self.donor_entries.setdefault(object_full_name(self._top_name), {})
+            entries[self._top_name] = etree.fromstring(bytes(self._capture))
+            self._capture = None
+        self._last_end = self._out.tell()
+        self._insert_ends[self._top_name.split('.', 1)[0]] = self._last_end
+
+    def _finish(self, out):
+        donors = {name: list(entries.values()) for name, entries in self.donor_entries.items()}
+        entries = self.build(donors) if self.build else []
+        size = out.tell()
+        if not entries:
+            write_atomic(self.path, splice=(out.fileno(), size, b'', size, 0))
+            return
+        if self._last_end is None:
+            raise ValueError("В ConfigDumpInfo.xml нет ни одной записи Metadata")
+        # Точка вставки — конец последней записи того же типа (или последней записи вообще)
+        inserts = {}
+        for entry in entries:
+            for meta in entry.iter("Metadata"):
+                version = meta.get("configVersion")
+                if version is not None:
+                    meta.set("configVersion", refresh_version(self.config_path, meta.get("name") or "", version,
+                                                              self.cache, self.stats))
+            type_name = (entry.get("name") or "").split('.', 1)[0]
+            inserts.setdefault(self._insert_ends.get(type_name, self._last_end), []).append(entry)
+            self.stats["inserted"] += 1
+        pieces = []
+        position = 0
+        for insert_end in sorted(inserts):
+            # Каждая новая запись предваряется отступом между корневыми записями; хвост
+            # записи, после которой идёт вставка (возможно, отступ закрывающего тега), остаётся за новыми
+            indent = self._indent
+            if indent is None:
+                following = os.pread(out.fileno(), 4096, insert_end)
+                indent = following[:len(following) - len(following.lstrip(b' \t\r\n'))]
+            middle = bytearray()
+            for entry in inserts[insert_end]:
+                middle += indent + etree.tostring(entry, encoding='UTF-8', with_tail=False)
+            pieces += [(position, insert_end - position), bytes(middle)]
+            position = insert_end
+        pieces.append((position, size - position))
+        write_atomic(self.path, pieces=(out.fileno(), pieces))
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Обновление configVersion в ConfigDumpInfo.xml по содержимому файлов.")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Путь к конфигурации (по умолчанию текущая директория)')
+    parser.add_argument('--cache-path', help=f'Файл кэша хэшей (по умолчанию <config-path>/{CACHE_FILE_NAME})')
+    parser.add_argument('--dry-run', action='store_true', help='Только посчитать, не записывать ConfigDumpInfo.xml и кэш')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        dump_info_path = os.path.join(args.config_path, "ConfigDumpInfo.xml")
+        tree, original = parse_xml(dump_info_path)
+        cache = DigestCache(args.config_path, args.cache_path)
+        stats = update_config_versions(args.config_path, tree.getroot(), cache)
+        if not args.dry_run:
+            if stats["updated"]:
+                write_xml(dump_info_path, tree, original)
+                logging.info(f"Обновлен {dump_info_path}")
+            cache.save()
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
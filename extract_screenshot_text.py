@@ -3,14 +3,24 @@
 """
 Скрипт для извлечения текста из скриншота и записи в файл.
 Запустите в репозитории, затем откройте созданный .txt в редакторе.
+
+Пакетный режим: передайте файлы, директории или маски (например, 'build/*.png') —
+скриншоты распознаются пулом процессов, результаты пишутся в JSONL по мере готовности.
+Распознанный текст кэшируется по хэшу содержимого изображения, поэтому
+неизменённые скриншоты повторно не распознаются.
 """
 import sys
 import os
+import glob
+import json
+import hashlib
+import argparse
+import concurrent.futures
 
-def main():
-    img_path = 'ShooterScreenshot-3321-12-01-26.png'
-    out_path = 'ShooterScreenshot-3321-12-01-26.txt'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')
+DEFAULT_CACHE = '.ocr_cache.jsonl'
 
+def check_dependencies():
     try:
         from PIL import Image
         import pytesseract
@@ -19,13 +29,116 @@ def main():
         print('  pip install pillow pytesseract')
         sys.exit(2)
 
+def ocr_image(img_path, lang='rus+eng'):
+    """Распознать текст изображения (выполняется и в процессах пула)."""
+    from PIL import Image
+    import pytesseract
+    with Image.open(img_path) as img:
+        return pytesseract.image_to_string(img, lang=lang)
+
+def file_hash(path):
+    """SHA-256 содержимого файла (ключ кэша)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def find_images(patterns):
+    """Файлы изображений по списку путей, директорий и масок, без повторов, в порядке аргументов."""
+    found = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths = sorted(os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names
+                           if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths = sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.isfile(pattern) else [])
+        for path in paths:
+            key = os.path.abspath(path)
+            if key not in seen and os.path.isfile(path):
+                seen.add(key)
+                found.append(path)
+    return found
+
+def load_cache(cache_path):
+    """Кэш {sha256:язык: текст}. Файл дописывается построчно, поэтому обрыв записи теряет только последнюю строку."""
+    cache = {}
+    if not os.path.exists(cache_path):
+        return cache
+    with open(cache_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                cache[record['key']] = record['text']
+            except (ValueError, KeyError):
+                continue
+    return cache
+
+def run_batch(patterns, output_path, cache_path, workers=None, lang='rus+eng'):
+    """Распознать найденные изображения. Возвращает (всего, из кэша, ошибок)."""
+    images = find_images(patterns)
+    if not images:
+        print('Изображения не найдены: ' + ', '.join(patterns))
+        sys.exit(1)
+
+    cache = load_cache(cache_path) if cache_path else {}
+    # Одинаковые по содержимому скриншоты распознаются один раз
+    by_key = {}
+    for path in images:
+        by_key.setdefault(f'{file_hash(path)}:{lang}', []).append(path)
+    pending = {key: paths for key, paths in by_key.items() if key not in cache}
+    print(f'Изображений: {len(images)}, уникальных: {len(by_key)}, в кэше: {len(by_key) - len(pending)}')
+
+    total = cached = errors = 0
+    with open(output_path, 'w', encoding='utf-8') as out, \
+            (open(cache_path, 'a', encoding='utf-8') if cache_path else open(os.devnull, 'w')) as cache_file:
+        def emit(key, text=None, error=None, from_cache=False):
+            nonlocal total, cached, errors
+            for path in by_key[key]:
+                record = {'path': path, 'sha256': key.split(':', 1)[0], 'cached': from_cache}
+                if error is None:
+                    record['text'] = text
+                else:
+                    record['error'] = error
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                total += 1
+                cached += from_cache
+                errors += error is not None
+            out.flush()
+
+        for key in by_key:
+            if key not in pending:
+                emit(key, cache[key], from_cache=True)
+
+        if pending:
+            check_dependencies()
+            if workers is None:
+                workers = os.cpu_count() or 1
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                futures = {pool.submit(ocr_image, paths[0], lang): key for key, paths in pending.items()}
+                for future in concurrent.futures.as_completed(futures):
+                    key = futures[future]
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        print(f'Ошибка при OCR {by_key[key][0]}: {e}')
+                        emit(key, error=str(e))
+                        continue
+                    cache_file.write(json.dumps({'key': key, 'text': text}, ensure_ascii=False) + '\n')
+                    cache_file.flush()
+                    emit(key, text)
+    return total, cached, errors
+
+def extract_single(img_path, out_path):
+    check_dependencies()
+
     if not os.path.exists(img_path):
         print(f'Файл не найден: {img_path}')
         sys.exit(1)
 
     try:
-        img = Image.open(img_path)
-        text = pytesseract.image_to_string(img, lang='rus+eng')
+        text = ocr_image(img_path)
         with open(out_path, 'w', encoding='utf-8') as f:
             f.write(text)
         print(f'OCR результат записан в {out_path}')
@@ -34,5 +147,23 @@ def main():
         print('Ошибка при OCR:', e)
         sys.exit(3)
 
+def main():
+    parser = argparse.ArgumentParser(description='Извлечение текста из скриншотов (OCR).')
+    parser.add_argument('paths', nargs='*', help='Файлы, директории или маски изображений (без аргументов — один скриншот по умолчанию)')
+    parser.add_argument('--output', default='ocr_results.jsonl', help='Файл JSONL с результатами пакетного режима')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help=f'Файл кэша OCR (по умолчанию {DEFAULT_CACHE}; пустая строка — без кэша)')
+    parser.add_argument('--workers', type=int, help='Число процессов OCR (по умолчанию число ядер)')
+    parser.add_argument('--lang', default='rus+eng', help='Языки tesseract (по умолчанию rus+eng)')
+    args = parser.parse_args()
+
+    if not args.paths:
+        extract_single('ShooterScreenshot-3321-12-01-26.png', 'ShooterScreenshot-3321-12-01-26.txt')
+        return
+
+    total, cached, errors = run_batch(args.paths, args.output, args.cache, args.workers, args.lang)
+    print(f'OCR результаты записаны в {args.output}: {total} изображений, из кэша {cached}, ошибок {errors}')
+    if errors:
+        sys.exit(3)
+
 if __name__ == '__main__':
     main()
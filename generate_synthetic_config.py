@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Генератор синтетической выгрузки конфигурации 1C для нагрузочных замеров.
+Берёт существующие объекты (по умолчанию Catalog.Предметы и Document.УчебныйДень)
+как шаблоны и размножает их до нужного числа объектов метаданных: файлы объектов,
+папки с формами и модулями, записи в Configuration.xml и ConfigDumpInfo.xml.
+UUID внутри каждой копии согласованы между файлами и ConfigDumpInfo.xml.
+"""
+
+import os
+import re
+import copy
+import uuid
+import random
+import shutil
+import argparse
+import logging
+from lxml import etree
+
+from config_index import ConfigIndex, TYPE_FOLDERS, XR_NS, DUMP_NS, split_full_name
+from clone_catalog_linux import rename_metadata_names, compile_rename_matcher
+from xml_writer import serialize
+
+UUID_PATTERN = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# Файлы и папки выгрузки, которые переносятся из исходной конфигурации
+ROOT_ENTRIES = ["Configuration.xml", "ConfigDumpInfo.xml", "Ext"]
+
+def copy_base_config(source_path, output_path):
+    """Скопировать исходную выгрузку (только файлы конфигурации) в output_path."""
+    if os.path.exists(output_path):
+        raise FileExistsError(f"Папка уже существует: {output_path}")
+    os.makedirs(output_path)
+    for entry in ROOT_ENTRIES + sorted(set(TYPE_FOLDERS.values())):
+        src = os.path.join(source_path, entry)
+        dst = os.path.join(output_path, entry)
+        if os.path.isdir(src):
+            shutil.copytree(src, dst)
+        elif os.path.isfile(src):
+            shutil.copy2(src, dst)
+
+class ObjectTemplate:
+    """Шаблон объекта: разобранный файл, файлы папки и записи ConfigDumpInfo."""
+
+    def __init__(self, index, full_name):
+        self.full_name = full_name
+        self.type_name, self.name = split_full_name(full_name)
+        self.tree = etree.parse(index.file_path(full_name))
+        self.object_dir = index.object_dir(full_name)
+        self.files = []  # (отн. путь, текст)
+        if os.path.isdir(self.object_dir):
+            for root, dirs, files in os.walk(self.object_dir):
+                for file in sorted(files):
+                    path = os.path.join(root, file)
+                    with open(path, 'r', encoding='utf-8', newline='') as f:
+                        self.files.append((os.path.relpath(path, self.object_dir), f.read()))
+        # Корневая запись объекта и его подчинённые записи верхнего уровня (формы, модули, макеты)
+        prefix = f"{full_name}."
+        self.dump_entries = [m for m in index.config_versions
+                             if isinstance(m.tag, str) and (m.get("name") == full_name or (m.get("name") or "").startswith(prefix))]
+        if not self.dump_entries:
+            raise ValueError(f"Нет записи ConfigDumpInfo для шаблона {full_name}")
+
+class UuidRemap:
+    """Согласованная замена UUID внутри одной копии объекта."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.mapping = {}
+
+    def __call__(self, value):
+        new = self.mapping.get(value)
+        if new is None:
+            new = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+            self.mapping[value] = new
+        return new
+
+    def remap_id(self, value):
+        """id записи ConfigDumpInfo: uuid или uuid.N."""
+        base, dot, suffix = value.partition('.')
+        return self(base) + dot + suffix
+
+def generate_object(index, template, new_name, rng):
+    """Создать копию шаблона с именем new_name: файлы на диске и записи в индексе."""
+    remap = UuidRemap(rng)
+    renames = ((template.name, new_name),)
+    full_name = f"{template.type_name}.{new_name}"
+
+    # Файл объекта
+    root = copy.deepcopy(template.tree.getroot())
+    rename_metadata_names(root, template.name, new_name)
+    for node in root.iter(etree.Element):
+        if node.get("uuid"):
+            node.set("uuid", remap(node.get("uuid")))
+        elif node.tag in (f"{XR_NS}TypeId", f"{XR_NS}ValueId") and node.text:
+            node.text = remap(node.text.strip())
+    with open(index.file_path(full_name), 'wb') as f:
+        f.write(serialize(etree.ElementTree(root)))
+
+    # Папка объекта: имена и UUID заменяются в тексте
+    if template.files:
+        matcher = compile_rename_matcher(renames)
+        object_dir = index.object_dir(full_name)
+        for rel_path, text in template.files:
+            path = os.path.join(object_dir, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            text = matcher.sub(new_name, text)
+            if rel_path.endswith('.xml'):
+                text = UUID_PATTERN.sub(lambda m: remap(m.group(0)), text)
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+
+    # Configuration.xml и ConfigDumpInfo.xml
+    index.add_child(full_name)
+    for entry in template.dump_entries:
+        new_entry = copy.deepcopy(entry)
+        for meta in new_entry.iter(f"{DUMP_NS}Metadata"):
+            name = meta.get("name")
+            meta.set("name", full_name + name[len(template.full_name):])
+            meta.set("id", remap.remap_id(meta.get("id")))
+        index.add_dump_entry(new_entry)
+
+def plan_objects(templates, count, seed):
+    """Распределение count объектов по шаблонам по кругу; возвращает список (шаблон, имя)."""
+    plan = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        plan.append((template, f"{template.name}_{i:06d}"))
+    random.Random(seed).shuffle(plan)
+    return plan
+
+def generate_config(source_path, output_path, count, templates=None, seed=0):
+    """Построить синтетическую выгрузку с count дополнительными объектами. Возвращает статистику."""
+    copy_base_config(source_path, output_path)
+    index = ConfigIndex(output_path)
+    templates = [ObjectTemplate(index, name) for name in (templates or ["Catalog.Предметы", "Document.УчебныйДень"])]
+    rng = random.Random(seed)
+    plan = plan_objects(templates, count, seed)
+    for number, (template, new_name) in enumerate(plan, 1):
+        generate_object(index, template, new_name, rng)
+        if number % 1000 == 0:
+            logging.info(f"Создано объектов: {number}/{count}")
+    index.save()
+    stats = {
+        "objects": count,
+        "configuration_bytes": os.path.getsize(index.configuration_path),
+        "dump_info_bytes": os.path.getsize(index.dump_info_path),
+    }
+    logging.info(f"Синтетическая выгрузка: {output_path}, объектов {count}, "
+                 f"ConfigDumpInfo.xml {stats['dump_info_bytes']} байт")
+    return stats
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетической выгрузки 1C заданного размера.")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Исходная выгрузка с шаблонами (по умолчанию текущая директория)')
+    parser.add_argument('--output', required=True, help='Папка для синтетической выгрузки (не должна существовать)')
+    parser.add_argument('--objects', type=int, default=1000, help='Число создаваемых объектов метаданных')
+    parser.add_argument('--template', action='append', dest='templates', metavar='Тип.Имя',
+                        help='Объект-шаблон (можно несколько; по умолчанию Catalog.Предметы и Document.УчебныйДень)')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора (имена и UUID воспроизводимы)')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        generate_config(args.config_path, args.output, args.objects, args.templates, args.seed)
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
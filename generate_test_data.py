@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Генератор тестовых данных для нагрузочной проверки проведения документов.
+Пишет файл обмена данными 1C (формат V8Exch:_1CV8DtUD, загружается обработкой
+"Выгрузка и загрузка данных XML") с документами УчебныйДень и строками Уроки, а
+также с элементами справочников, на которые они ссылаются (Предметы, Учителя, Кабинеты).
+Состав реквизитов и их типы читаются из выгрузки конфигурации, поэтому подходят и
+клоны документа. Документы пишутся потоком: память не зависит от их числа.
+Диапазон дат делится на отрезки, которые генерируются пулом процессов в отдельные
+части и затем склеиваются по порядку; при одном зерне результат не зависит от числа процессов.
+"""
+
+import os
+import time
+import uuid
+import random
+import datetime
+import tempfile
+import argparse
+import logging
+import concurrent.futures
+from xml.sax.saxutils import escape
+
+from config_index import ConfigIndex, MD_NS, split_full_name
+from xml_writer import copy_range
+
+V8_NS = "{http://v8.1c.ru/8.1/data/core}"
+
+EMPTY_REF = "00000000-0000-0000-0000-000000000000"
+
+# Число отрезков дат на процесс: мелкие отрезки выравнивают нагрузку между процессами
+CHUNKS_PER_WORKER = 4
+
+HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+          '<V8Exch:_1CV8DtUD xmlns:V8Exch="http://www.1c.ru/V8/1CV8DtUD/" xmlns:core="http://v8.1c.ru/data" '
+          'xmlns:v8="http://v8.1c.ru/8.1/data/enterprise/current-config" xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+          'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+          '\t<V8Exch:Data>\n')
+FOOTER = ('\t</V8Exch:Data>\n'
+          '\t<PredefinedData/>\n'
+          '</V8Exch:_1CV8DtUD>\n')
+
+# Словари для наименований и строковых реквизитов
+DESCRIPTIONS = {
+    "Catalog.Предметы": ["Математика", "Русский язык", "Литература", "Физика", "Химия", "Биология", "История",
+                         "География", "Информатика", "Английский язык", "Обществознание", "Физкультура"],
+    "Catalog.Учителя": ["Иванова А.П.", "Петров С.Н.", "Сидорова Е.В.", "Кузнецов И.А.", "Смирнова О.Л.",
+                        "Попов Д.В.", "Морозова Т.И.", "Волков Р.С."],
+}
+WORDS = ["параграф", "упражнение", "задача", "номер", "страница", "прочитать", "выучить", "решить", "повторить",
+         "написать", "конспект", "правило", "стихотворение", "доклад", "таблица", "отлично", "хорошо", "внимательнее"]
+
+def read_type(type_node):
+    """Описание типа реквизита: ('ref', 'Catalog.X'), ('string', длина), ('boolean',),
+    ('decimal', разрядов, дробных, неотрицательное) или ('date',). Для составного типа — первый."""
+    if type_node is None:
+        return ("string", 0)
+    type_name = type_node.findtext(f"{V8_NS}Type") or ""
+    if type_name.startswith("cfg:") and "Ref." in type_name:
+        prefix, name = type_name[4:].split('.', 1)
+        return ("ref", f"{prefix[:-len('Ref')]}.{name}")
+    if type_name == "xs:boolean":
+        return ("boolean",)
+    if type_name == "xs:decimal":
+        qualifiers = type_node.find(f"{V8_NS}NumberQualifiers")
+        digits = int(qualifiers.findtext(f"{V8_NS}Digits") or 10) if qualifiers is not None else 10
+        fraction = int(qualifiers.findtext(f"{V8_NS}FractionDigits") or 0) if qualifiers is not None else 0
+        nonnegative = qualifiers is not None and qualifiers.findtext(f"{V8_NS}AllowedSign") == "Nonnegative"
+        return ("decimal", digits, fraction, nonnegative)
+    if type_name == "xs:dateTime":
+        return ("date",)
+    length = type_node.findtext(f"{V8_NS}StringQualifiers/{V8_NS}Length")
+    return ("string", int(length or 0))
+
+def read_attributes(node):
+    """Реквизиты узла объекта или табличной части: [(имя, тип)]."""
+    attributes = []
+    child_objects = node.find(f"{MD_NS}ChildObjects")
+    for child in (child_objects if child_objects is not None else []):
+        if child.tag == f"{MD_NS}Attribute":
+            properties = child.find(f"{MD_NS}Properties")
+            attributes.append((properties.findtext(f"{MD_NS}Name"), read_type(properties.find(f"{MD_NS}Type"))))
+    return attributes
+
+class DataModel:
+    """Структура документа и справочников, на которые он ссылается (прямо или через другие справочники)."""
+
+    def __init__(self, index, document):
+        self.document = document
+        root = index.object_root(document)
+        properties = root.find(f"{MD_NS}Properties")
+        self.number_type = properties.findtext(f"{MD_NS}NumberType") or "String"
+        self.number_length = int(properties.findtext(f"{MD_NS}NumberLength") or 0)
+        self.check_unique = properties.findtext(f"{MD_NS}CheckUnique") == "true"
+        self.attributes = read_attributes(root)
+        self.tabular_sections = []
+        for child in root.find(f"{MD_NS}ChildObjects"):
+            if child.tag == f"{MD_NS}TabularSection":
+                name = child.findtext(f"{MD_NS}Properties/{MD_NS}Name")
+                self.tabular_sections.append((name, read_attributes(child)))
+
+        # Справочники в порядке зависимостей: сначала те, на которые ссылаются другие
+        self.catalogs = []  # [(Тип.Имя, тип кода, длина кода, длина наименования, реквизиты)]
+        seen = set()
+        def visit(full_name):
+            if full_name in seen or split_full_name(full_name)[0] != "Catalog" or full_name not in index:
+                return
+            seen.add(full_name)
+            catalog = index.object_root(full_name)
+            catalog_properties = catalog.find(f"{MD_NS}Properties")
+            attributes = read_attributes(catalog)
+            for target in self.referenced(attributes):
+                visit(target)
+            self.catalogs.append((full_name, catalog_properties.findtext(f"{MD_NS}CodeType") or "String",
+                          int(catalog_properties.findtext(f"{MD_NS}CodeLength") or 0),
+                          int(catalog_properties.findtext(f"{MD_NS}DescriptionLength") or 0), attributes))
+        for target in self.referenced(self.attributes + [a for _, fields in self.tabular_sections for a in fields]):
+            visit(target)
+
+    @staticmethod
+    def referenced(attributes):
+        return [field_type[1] for _, field_type in attributes if field_type[0] == "ref"]
+
+def seeded_rng(seed, key):
+    """Отдельный генератор для ключа (дата, справочник): результат не зависит от разбиения на части."""
+    return random.Random(f"{seed}:{key}")
+
+def random_ref(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def random_text(rng, length):
+    text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+    return text[:length] if length else text
+
+def random_value(rng, field_type, refs):
+    """Значение реквизита в виде текста XML."""
+    kind = field_type[0]
+    if kind == "ref":
+        pool = refs.get(field_type[1])
+        return rng.choice(pool) if pool else EMPTY_REF
+    if kind == "boolean":
+        return "true" if rng.random() < 0.5 else "false"
+    if kind == "decimal":
+        _, digits, fraction, nonnegative = field_type
+        value = rng.randrange(10 ** digits)
+        if not nonnegative and rng.random() < 0.5:
+            value = -value
+        if not fraction:
+            return str(value)
+        sign = "-" if value < 0 else ""
+        text = str(abs(value)).zfill(fraction + 1)
+        return f"{sign}{text[:-fraction]}.{text[-fraction:]}"
+    if kind == "date":
+        return "0001-01-01T00:00:00"
+    # Строки заполнены примерно наполовину, как в реальных данных
+    return escape(random_text(rng, field_type[1])) if rng.random() < 0.5 else ""
+
+def write_field(out, indent, name, value):
+    if value == "":
+        out.write(f"{indent}<v8:{name}/>\n")
+    else:
+        out.write(f"{indent}<v8:{name}>{value}</v8:{name}>\n")
+
+def catalog_refs(model, counts, seed):
+    """Ссылки элементов справочников: {Тип.Имя: [uuid]} (детерминированы зерном)."""
+    refs = {}
+    for full_name, *_ in model.catalogs:
+        rng = seeded_rng(seed, full_name)
+        refs[full_name] = [random_ref(rng) for _ in range(counts.get(full_name, counts.get(None, 20)))]
+    return refs
+
+def write_catalogs(out, model, refs, seed):
+    """Элементы справочников (в порядке зависимостей). Возвращает их число."""
+    written = 0
+    for full_name, code_type, code_length, description_length, attributes in model.catalogs:
+        name = split_full_name(full_name)[1]
+        rng = seeded_rng(seed, f"{full_name}:items")
+        names = DESCRIPTIONS.get(full_name) or [name]
+        for number, ref in enumerate(refs[full_name], 1):
+            description = names[(number - 1) % len(names)]
+            if number > len(names):
+                description = f"{description} {(number - 1) // len(names) + 1}"
+            out.write(f"\t\t<v8:CatalogObject.{name}>\n")
+            write_field(out, "\t\t\t", "Ref", ref)
+            write_field(out, "\t\t\t", "DeletionMark", "false")
+            # Нулевая длина кода или наименования означает, что реквизита у справочника нет
+            if code_length:
+                code = str(number) if code_type == "Number" else str(number).zfill(min(code_length, 9))
+                write_field(out, "\t\t\t", "Code", code)
+            if description_length:
+                write_field(out, "\t\t\t", "Description", escape(description[:description_length]))
+            for attribute, field_type in attributes:
+                write_field(out, "\t\t\t", attribute, random_value(rng, field_type, refs))
+            out.write(f"\t\t</v8:CatalogObject.{name}>\n")
+            written += 1
+    return written
+
+def date_range(start, end, weekdays_only=False):
+    day = start
+    while day <= end:
+        if not weekdays_only or day.weekday() < 5:
+            yield day
+        day += datetime.timedelta(days=1)
+
+def document_number(model, start, day, number, per_day):
+    """Номер документа, уникальный в пределах периода.
+
+    Один документ в день — как в ПередЗаписью (Серверный.ПолучитьНомер): дата в формате yyyyMMdd.
+    Несколько — сквозной номер по порядковому дню периода и номеру в дне, дополненный нулями до NumberLength.
+    """
+    if per_day == 1:
+        return day.strftime("%Y%m%d")[:model.number_length or None]
+    sequence = str((day - start).days * per_day + number + 1)
+    return sequence.zfill(model.number_length) if model.number_type == "String" else sequence
+
+def check_numbers(model, start, end, per_day):
+    """Убедиться, что уникальные номера за период помещаются в NumberLength."""
+    if per_day == 1:
+        width = 8
+    else:
+        width = len(str(((end - start).days + 1) * per_day))
+    if model.number_length and width > model.number_length:
+        raise ValueError(f"Номера {model.document} не помещаются в длину {model.number_length}: "
+                         f"уменьшите период или --per-day")
+
+def generate_documents(task):
+    """Тело процесса пула: документы за отрезок дат в файл части. Возвращает (путь, документов, строк)."""
+    model, refs, start, end, options, part_path = task
+    document_name = split_full_name(model.document)[1]
+    documents = rows = 0
+    with open(part_path, 'w', encoding='utf-8', buffering=1 << 20) as out:
+        for day in date_range(start, end, options["weekdays_only"]):
+            rng = seeded_rng(options["seed"], day.isoformat())
+            for i in range(options["per_day"]):
+                moment = datetime.datetime.combine(day, datetime.time(8)) + datetime.timedelta(seconds=i)
+                out.write(f"\t\t<v8:DocumentObject.{document_name}>\n")
+                write_field(out, "\t\t\t", "Ref", random_ref(rng))
+                write_field(out, "\t\t\t", "DeletionMark", "false")
+                write_field(out, "\t\t\t", "Date", moment.strftime("%Y-%m-%dT%H:%M:%S"))
+                write_field(out, "\t\t\t", "Number",
+                            document_number(model, options["start"], day, i, options["per_day"]))
+                write_field(out, "\t\t\t", "Posted", "false")
+                for attribute, field_type in model.attributes:
+                    write_field(out, "\t\t\t", attribute, random_value(rng, field_type, refs))
+                for section, fields in model.tabular_sections:
+                    out.write(f"\t\t\t<v8:{section}>\n")
+                    for _ in range(rng.randint(options["min_rows"], options["max_rows"])):
+                        out.write("\t\t\t\t<v8:Row>\n")
+                        for attribute, field_type in fields:
+                            write_field(out, "\t\t\t\t\t", attribute, random_value(rng, field_type, refs))
+                        out.write("\t\t\t\t</v8:Row>\n")
+                        rows += 1
+                    out.write(f"\t\t\t</v8:{section}>\n")
+                out.write(f"\t\t</v8:DocumentObject.{document_name}>\n")
+                documents += 1
+    return part_path, documents, rows
+
+def split_dates(start, end, parts):
+    """Разбить [start, end] на не более чем parts смежных отрезков."""
+    days = (end - start).days + 1
+    size = max(1, -(-days // parts))
+    ranges = []
+    day = start
+    while day <= end:
+        last = min(end, day + datetime.timedelta(days=size - 1))
+        ranges.append((day, last))
+        day = last + datetime.timedelta(days=1)
+    return ranges
+
+def generate_data(config_path, output_path, document="Document.УчебныйДень", start=None, end=None, per_day=1,
+                  min_rows=4, max_rows=8, counts=None, weekdays_only=False, seed=0, workers=None):
+    """Сгенерировать файл данных. Возвращает статистику: catalog_items, documents, rows, bytes."""
+    if end < start:
+        raise ValueError(f"Конец периода {end} раньше начала {start}")
+    if per_day < 1:
+        raise ValueError(f"Некорректное число документов на день: {per_day}")
+    if not 0 <= min_rows <= max_rows:
+        raise ValueError(f"Некорректное число строк: {min_rows}-{max_rows}")
+    index = ConfigIndex(config_path, load_dump_info=False)
+    if document not in index:
+        raise ValueError(f"Документ {document} не найден в конфигурации")
+    model = DataModel(index, document)
+    if model.check_unique:
+        check_numbers(model, start, end, per_day)
+    refs = catalog_refs(model, counts or {}, seed)
+    logging.info(f"{document}: табличные части {', '.join(name for name, _ in model.tabular_sections) or 'нет'}; "
+                 f"справочники: {', '.join(f'{name} ({len(refs[name])})' for name, *_ in model.catalogs)}")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    options = {"seed": seed, "start": start, "per_day": per_day, "min_rows": min_rows, "max_rows": max_rows,
+               "weekdays_only": weekdays_only}
+    directory = os.path.dirname(os.path.abspath(output_path))
+    work_dir = tempfile.mkdtemp(dir=directory, prefix='.' + os.path.basename(output_path) + '.')
+    stats = {"catalog_items": 0, "documents": 0, "rows": 0, "bytes": 0}
+    try:
+        tasks = [(model, refs, first, last, options, os.path.join(work_dir, f"part{number:05d}.xml"))
+                 for number, (first, last) in enumerate(split_dates(start, end, workers * CHUNKS_PER_WORKER))]
+        if workers > 1 and len(tasks) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(generate_documents, tasks))
+        else:
+            results = [generate_documents(task) for task in tasks]
+
+        # Сборка: заголовок и справочники, затем части в порядке дат, без чтения частей в память
+        tmp_path = os.path.join(work_dir, "output.xml")
+        with open(tmp_path, 'w', encoding='utf-8', buffering=1 << 20) as out:
+            out.write(HEADER)
+            stats["catalog_items"] = write_catalogs(out, model, refs, seed)
+            out.flush()
+            for part_path, documents, rows in results:
+                with open(part_path, 'rb') as part:
+                    copy_range(part.fileno(), out.fileno(), 0, os.fstat(part.fileno()).st_size)
+                os.remove(part_path)
+                stats["documents"] += documents
+                stats["rows"] += rows
+            out.write(FOOTER)
+        os.replace(tmp_path, output_path)
+        stats["bytes"] = os.path.getsize(output_path)
+    finally:
+        for file in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, file))
+        os.rmdir(work_dir)
+    return stats
+
+def parse_counts(values):
+    """--items N или --items Catalog.X=N -> {None: N, 'Catalog.X': N}."""
+    counts = {}
+    for value in values or []:
+        name, _, count = value.rpartition('=')
+        counts[name or None] = int(count)
+    return counts
+
+def parse_date(value):
+    return datetime.date.fromisoformat(value)
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация тестовых документов УчебныйДень и справочников в файл обмена данными 1C.")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Путь к выгрузке конфигурации (по умолчанию текущая директория)')
+    parser.add_argument('--output', required=True, help='Файл данных XML для загрузки в информационную базу')
+    parser.add_argument('--document', default='Document.УчебныйДень', help='Документ (Тип.Имя), по умолчанию Document.УчебныйДень')
+    parser.add_argument('--start', type=parse_date, default=datetime.date(2024, 9, 1), help='Начало периода (ГГГГ-ММ-ДД)')
+    parser.add_argument('--end', type=parse_date, default=datetime.date(2025, 5, 31), help='Конец периода (ГГГГ-ММ-ДД)')
+    parser.add_argument('--per-day', type=int, default=1, help='Документов на день')
+    parser.add_argument('--min-rows', type=int, default=4, help='Минимум строк табличной части')
+    parser.add_argument('--max-rows', type=int, default=8, help='Максимум строк табличной части')
+    parser.add_argument('--items', action='append', metavar='[Catalog.X=]N',
+                        help='Число элементов справочников (по умолчанию 20; можно задать для отдельного справочника)')
+    parser.add_argument('--weekdays', action='store_true', help='Только рабочие дни (пн-пт)')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора (результат воспроизводим)')
+    parser.add_argument('--workers', type=int, help='Число процессов (1 — без пула)')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        started = time.perf_counter()
+        stats = generate_data(args.config_path, args.output, args.document, args.start, args.end, args.per_day,
+                              args.min_rows, args.max_rows, parse_counts(args.items), args.weekdays, args.seed,
+                              args.workers)
+        logging.info(f"Файл данных: {args.output} ({stats['bytes']} байт): элементов справочников {stats['catalog_items']}, "
+                     f"документов {stats['documents']}, строк {stats['rows']}")
+        elapsed = time.perf_counter() - started
+        logging.info(f"Время: {elapsed:.1f} с ({stats['documents'] / max(elapsed, 0.001):.0f} документов/с)")
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
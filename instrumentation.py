@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Инструментирование фаз клонирования.
+Интервалы (span) фиксируют время, процессорное время, память и счётчики файлов/байт/UUID; результат сохраняется в формате Chrome Trace Event
+(открывается в chrome://tracing, Perfetto, speedscope) и сводится в таблицу.
+Пока трассировка не включена, span и add ничего не делают.
+
+Память интервала — прирост, а не абсолютное значение: rss_delta_mb — изменение текущего
+RSS процесса от начала до конца интервала, peak_growth_mb — на сколько за интервал вырос
+пиковый RSS (процесса и пула). Пик, достигнутый в более ранней фазе, следующим не приписывается;
+фаза, которая выделила и освободила память ниже уже достигнутого пика, даёт нулевой рост пика.
+"""
+
+import os
+import json
+import time
+import logging
+import resource
+import contextlib
+
+# Счётчики, которые суммируются во всех открытых интервалах
+COUNTERS = ("files_read", "bytes_read", "files_written", "bytes_written", "replacements", "uuids_regenerated")
+
+def cpu_seconds():
+    """Процессорное время процесса вместе с завершёнными дочерними процессами (пул)."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+def peak_rss_mb():
+    """Пиковый RSS процесса и дочерних процессов, МБ (ru_maxrss в Linux — в килобайтах)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+def current_rss_mb():
+    """Текущий RSS процесса, МБ (/proc/self/statm; где его нет — None)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+class Tracer:
+    """Сборщик интервалов и событий трассировки."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.pid = os.getpid()
+        self._stack = []     # открытые интервалы: словари счётчиков
+        self._lanes = set()  # tid, для которых уже выдано имя дорожки
+
+    def enable(self):
+        self.enabled = True
+        self.pid = os.getpid()
+        self.events.append({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                            "args": {"name": "clone_catalog_linux"}})
+        self._lane(self.pid, "main")
+
+    def _lane(self, tid, name):
+        if tid not in self._lanes:
+            self._lanes.add(tid)
+            self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}})
+
+    @contextlib.contextmanager
+    def span(self, name, cat="phase", **args):
+        """Интервал name: время, CPU, прирост RSS и пика RSS, счётчики всех вложенных операций."""
+        if not self.enabled:
+            yield
+            return
+        counters = dict.fromkeys(COUNTERS, 0)
+        self._stack.append(counters)
+        start = time.perf_counter_ns()
+        cpu_start = cpu_seconds()
+        rss_start = current_rss_mb()
+        peak_start = peak_rss_mb()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            self._stack.pop()
+            event_args = dict(args)
+            event_args.update({key: value for key, value in counters.items() if value})
+            event_args["cpu_ms"] = round((cpu_seconds() - cpu_start) * 1000, 3)
+            rss_end = current_rss_mb()
+            if rss_start is not None and rss_end is not None:
+                event_args["rss_delta_mb"] = round(rss_end - rss_start, 1)
+            event_args["peak_growth_mb"] = round(peak_rss_mb() - peak_start, 1)
+            self.events.append({"name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": self.pid,
+                                "ts": start / 1000, "dur": duration / 1000, "args": event_args})
+
+    def add(self, **values):
+        """Прибавить счётчики (files_read=1, bytes_written=...) ко всем открытым интервалам."""
+        if not self.enabled:
+            return
+        for counters in self._stack:
+            for key, value in values.items():
+                counters[key] = counters.get(key, 0) + value
+
+    def complete(self, name, start_ns, duration_ns, tid, cat="file", **args):
+        """Готовый интервал, замеренный в другом процессе (дорожка tid)."""
+        if not self.enabled:
+            return
+        self._lane(tid, "main" if tid == self.pid else f"worker {tid}")
+        self.events.append({"name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": tid,
+                            "ts": start_ns / 1000, "dur": duration_ns / 1000, "args": args})
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        logging.info(f"Трассировка сохранена: {path} ({len(self.events)} событий)")
+
+    def summary(self, cat="phase"):
+        """Сводка по интервалам категории cat: имя -> суммы времени, CPU и счётчиков, наибольшие приросты памяти."""
+        result = {}
+        for event in self.events:
+            if event["ph"] != "X" or event.get("cat") != cat:
+                continue
+            row = result.setdefault(event["name"], {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_growth_mb": 0.0})
+            row["count"] += 1
+            row["wall_ms"] += event["dur"] / 1000
+            for key, value in event["args"].items():
+                if key in ("peak_growth_mb", "rss_delta_mb"):
+                    row[key] = max(row.get(key, value), value)
+                elif key == "cpu_ms" or key in COUNTERS:
+                    row[key] = row.get(key, 0) + value
+        return result
+
+    def print_summary(self):
+        print(f"\n{'Фаза':<28}{'Время, мс':>12}{'CPU, мс':>12}{'ΔRSS, МБ':>10}{'Рост пика, МБ':>15}"
+              f"{'Файлов R/W':>14}{'Байт R/W':>22}{'UUID':>7}")
+        for name, row in self.summary().items():
+            files = f"{row.get('files_read', 0)}/{row.get('files_written', 0)}"
+            size = f"{row.get('bytes_read', 0)}/{row.get('bytes_written', 0)}"
+            delta = f"{row['rss_delta_mb']:.1f}" if "rss_delta_mb" in row else "-"
+            print(f"{name:<28}{row['wall_ms']:>12.1f}{row['cpu_ms']:>12.1f}{delta:>10}{row['peak_growth_mb']:>15.1f}"
+                  f"{files:>14}{size:>22}{row.get('uuids_regenerated', 0):>7}")
+
+# Общий экземпляр для всех модулей
+tracer = Tracer()
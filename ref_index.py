@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Индекс перекрёстных ссылок выгрузки конфигурации 1C.
+Для каждого .xml/.bsl файла хранит, на какие объекты метаданных он ссылается
+(типы cfg:CatalogRef.X, пути Catalog.X.Attribute.Y в схемах компоновки,
+Справочники.X / Документ.X / Движения.X в модулях и текстах запросов).
+Индекс сохраняется в JSON и обновляется инкрементально по mtime, размеру и хэшу,
+так что переименование или перенацеливание объекта трогает только файлы,
+которые действительно на него ссылаются.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import logging
+import re
+
+from config_index import ConfigIndex, GENERATED_TYPES, TYPE_FOLDERS, split_full_name
+
+INDEX_FILE_NAME = ".refindex.json"
+INDEX_VERSION = 3
+
+# Файлы-описания состава конфигурации: имена в них — определения, а не ссылки
+ROOT_FILES = {"Configuration.xml", "ConfigDumpInfo.xml"}
+
+# Русские и множественные формы типов: Тип -> (единственное число, множественное число)
+TYPE_WORDS = {
+    "Catalog": (("Справочник",), ("Catalogs", "Справочники")),
+    "Document": (("Документ",), ("Documents", "Документы")),
+    "InformationRegister": (("РегистрСведений",), ("InformationRegisters", "РегистрыСведений")),
+    "AccumulationRegister": (("РегистрНакопления",), ("AccumulationRegisters", "РегистрыНакопления")),
+    "Report": (("Отчет", "Отчёт"), ("Reports", "Отчеты", "Отчёты")),
+}
+
+# Категории генерируемых типов (GENERATED_TYPES и типы табличных частей) по-русски
+CATEGORY_WORDS = {
+    "Object": "Объект",
+    "Ref": "Ссылка",
+    "Selection": "Выборка",
+    "List": "Список",
+    "Manager": "Менеджер",
+    "Record": "Запись",
+    "RecordSet": "НаборЗаписей",
+    "RecordKey": "КлючЗаписи",
+    "RecordManager": "МенеджерЗаписи",
+    "TabularSection": "ТабличнаяЧасть",
+    "TabularSectionRow": "ТабличнаяЧастьСтрока",
+}
+
+# Типы с табличными частями: CatalogTabularSection.X.Т, ДокументТабличнаяЧастьСтрока.X.Т
+TABULAR_SECTION_TYPES = ("Catalog", "Document", "Report")
+
+def build_reference_prefixes():
+    """Префикс ссылки -> типы метаданных: имя типа, его генерируемые типы (англ. и рус.) и менеджеры."""
+    prefixes = {}
+    for type_name, categories in GENERATED_TYPES.items():
+        categories = categories + (("TabularSection", "TabularSectionRow") if type_name in TABULAR_SECTION_TYPES else ())
+        singular, plural = TYPE_WORDS[type_name]
+        words = (type_name,) + singular + plural
+        words += tuple(f"{type_name}{category}" for category in categories)
+        words += tuple(f"{word}{CATEGORY_WORDS[category]}" for word in singular for category in categories)
+        for word in words:
+            prefixes[word] = (type_name,)
+    prefixes.update({
+        "CommonForm": ("CommonForm",),
+        "CommonForms": ("CommonForm",),
+        "ОбщаяФорма": ("CommonForm",),
+        "ОбщиеФормы": ("CommonForm",),
+        # Движения.X в модуле документа — набор записей регистра X (вид регистра определяется по конфигурации)
+        "Движения": ("InformationRegister", "AccumulationRegister"),
+    })
+    return prefixes
+
+# Префикс ссылки -> типы метаданных, на которые он указывает
+REFERENCE_PREFIXES = build_reference_prefixes()
+
+REFERENCE_PATTERN = re.compile(
+    r'(?<!\w)(' + '|'.join(sorted(REFERENCE_PREFIXES, key=len, reverse=True)) + r')\.(\w+)'
+)
+
+def resolve_reference(prefix, name, known=None):
+    """Полные имена, на которые указывает Префикс.Имя.
+
+    Префикс с несколькими типами (Движения) разрешается только в объекты из known
+    (полные имена существующих объектов); без known — во все свои типы.
+    """
+    type_names = REFERENCE_PREFIXES[prefix]
+    if len(type_names) == 1:
+        return [f"{type_names[0]}.{name}"]
+    return [f"{type_name}.{name}" for type_name in type_names
+            if known is None or f"{type_name}.{name}" in known]
+
+def extract_references(text, known=None):
+    """Ссылки из текста файла: ({Тип.Имя: число вхождений}, {Префикс.Имя: число вхождений}).
+
+    Ссылки с неоднозначным префиксом (Движения.X) возвращаются вторым словарём как
+    есть: они разрешаются по текущему составу конфигурации (см. resolve_reference).
+    """
+    refs = {}
+    ambiguous = {}
+    for match in REFERENCE_PATTERN.finditer(text):
+        if len(REFERENCE_PREFIXES[match.group(1)]) > 1:
+            ambiguous[match.group(0)] = ambiguous.get(match.group(0), 0) + 1
+            continue
+        full_name = resolve_reference(match.group(1), match.group(2))[0]
+        refs[full_name] = refs.get(full_name, 0) + 1
+    return refs, ambiguous
+
+def is_indexed_file(rel_path):
+    return rel_path.endswith(('.xml', '.bsl')) and rel_path not in ROOT_FILES
+
+def own_paths(full_name):
+    """Относительные пути файла и папки самого объекта (его определение)."""
+    type_name, name = split_full_name(full_name)
+    folder = TYPE_FOLDERS.get(type_name, type_name + "s")
+    return os.path.join(folder, f"{name}.xml"), os.path.join(folder, name) + os.sep
+
+def path_owner(rel_path):
+    """Полное имя объекта, которому принадлежит файл (Documents/X.xml, Documents/X/...), или None."""
+    folder, _, rest = rel_path.partition(os.sep)
+    types = {type_folder: type_name for type_name, type_folder in TYPE_FOLDERS.items()}
+    if folder not in types or not rest:
+        return None
+    name = rest.split(os.sep, 1)[0]
+    if name.endswith('.xml') and os.sep not in rest:
+        name = name[:-len('.xml')]
+    return f"{types[folder]}.{name}"
+
+class ReferenceIndex:
+    """Сохраняемый индекс ссылок: файл -> объекты и обратно."""
+
+    def __init__(self, config_path, index_path=None, known=None):
+        self.config_path = config_path
+        self.index_path = index_path or os.path.join(config_path, INDEX_FILE_NAME)
+        # Существующие объекты: по ним разрешаются неоднозначные ссылки Движения.X
+        self.known = set(known if known is not None else ConfigIndex(config_path, load_dump_info=False).names())
+        # отн. путь -> {"mtime_ns", "size", "sha1", "refs": {Тип.Имя: n}, "ambiguous": {Префикс.Имя: n}}
+        self.files = {}
+        self._inverted = {}  # Тип.Имя -> множество отн. путей
+        self.load()
+
+    def load(self):
+        self.files = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.files = data.get("files", {})
+                else:
+                    logging.info(f"Индекс ссылок устаревшей версии, будет перестроен: {self.index_path}")
+            except (OSError, ValueError) as e:
+                logging.warning(f"Не удалось прочитать индекс ссылок {self.index_path}: {e}")
+        self._rebuild_inverted()
+
+    def save(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        logging.info(f"Индекс ссылок сохранён: {self.index_path}")
+
+    def _entry_refs(self, entry):
+        """Ссылки записи индекса с неоднозначными ссылками, разрешёнными по текущей конфигурации."""
+        refs = dict(entry["refs"])
+        for reference, count in entry.get("ambiguous", {}).items():
+            prefix, name = reference.split('.', 1)
+            for full_name in resolve_reference(prefix, name, self.known):
+                refs[full_name] = refs.get(full_name, 0) + count
+        return refs
+
+    def _rebuild_inverted(self):
+        self._inverted = {}
+        for rel_path, entry in self.files.items():
+            for full_name in self._entry_refs(entry):
+                self._inverted.setdefault(full_name, set()).add(rel_path)
+
+    def _set_entry(self, rel_path, entry):
+        old = self.files.get(rel_path)
+        if old is not None:
+            for full_name in self._entry_refs(old):
+                paths = self._inverted.get(full_name)
+                if paths is not None:
+                    paths.discard(rel_path)
+                    if not paths:
+                        del self._inverted[full_name]
+        if entry is None:
+            self.files.pop(rel_path, None)
+            return
+        self.files[rel_path] = entry
+        for full_name in self._entry_refs(entry):
+            self._inverted.setdefault(full_name, set()).add(rel_path)
+
+    def refresh_file(self, rel_path, stat=None):
+        """Переиндексировать файл, если он изменился. Возвращает 'unchanged', 'touched' или 'indexed'."""
+        path = os.path.join(self.config_path, rel_path)
+        if stat is None:
+            stat = os.stat(path)
+        old = self.files.get(rel_path)
+        if old is not None and old["mtime_ns"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+            return 'unchanged'
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if old is not None and old["sha1"] == digest:
+            # Файл переписан тем же содержимым — обновляем только отметку времени
+            old["mtime_ns"] = stat.st_mtime_ns
+            old["size"] = stat.st_size
+            return 'touched'
+        refs, ambiguous = extract_references(data.decode('utf-8', errors='replace'))
+        self._set_entry(rel_path, {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest, "refs": refs,
+                                   "ambiguous": ambiguous})
+        return 'indexed'
+
+    def update(self):
+        """Инкрементальное обновление по всем .xml/.bsl файлам выгрузки. Возвращает статистику."""
+        stats = {"unchanged": 0, "touched": 0, "indexed": 0, "removed": 0}
+        seen = set()
+        for root, dirs, files in os.walk(self.config_path):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for file in files:
+                rel_path = os.path.relpath(os.path.join(root, file), self.config_path)
+                if not is_indexed_file(rel_path):
+                    continue
+                seen.add(rel_path)
+                stats[self.refresh_file(rel_path)] += 1
+        for rel_path in [p for p in self.files if p not in seen]:
+            self._set_entry(rel_path, None)
+            stats["removed"] += 1
+        logging.info(f"Индекс ссылок: переиндексировано {stats['indexed']}, без изменений {stats['unchanged']}, "
+                     f"тот же хэш {stats['touched']}, удалено {stats['removed']}")
+        return stats
+
+    def files_referencing(self, full_name, include_self=False):
+        """Отсортированный список файлов, ссылающихся на объект."""
+        paths = self._inverted.get(full_name, set())
+        if not include_self:
+            own_file, own_dir = own_paths(full_name)
+            paths = {p for p in paths if p != own_file and not p.startswith(own_dir)}
+        return sorted(paths)
+
+    def references(self, rel_path):
+        entry = self.files.get(rel_path)
+        return self._entry_refs(entry) if entry else {}
+
+    def retarget_references(self, full_name, new_name, include_self=False):
+        """Перенацелить ссылки Тип.Имя на Тип.НовоеИмя только в файлах, которые на него ссылаются.
+
+        Возвращает список изменённых файлов.
+        """
+        name = split_full_name(full_name)[1]
+
+        def replace(match):
+            if match.group(2) == name and full_name in resolve_reference(match.group(1), name, self.known):
+                return f"{match.group(1)}.{new_name}"
+            return match.group(0)
+
+        changed = []
+        for rel_path in self.files_referencing(full_name, include_self):
+            path = os.path.join(self.config_path, rel_path)
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+            new_content = REFERENCE_PATTERN.sub(replace, content)
+            if new_content != content:
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(new_content)
+                changed.append(rel_path)
+                logging.info(f"Перенацелены ссылки: {rel_path}")
+            self.refresh_file(rel_path)
+        return changed
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Индекс перекрёстных ссылок выгрузки 1C.")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Путь к конфигурации (по умолчанию текущая директория)')
+    parser.add_argument('--index-path', help=f'Файл индекса (по умолчанию <config-path>/{INDEX_FILE_NAME})')
+    parser.add_argument('--find', metavar='Тип.Имя', action='append', default=[], help='Вывести файлы, ссылающиеся на объект')
+    parser.add_argument('--retarget', nargs=2, metavar=('Тип.Имя', 'НовоеИмя'), help='Перенацелить ссылки на объект на другое имя')
+    parser.add_argument('--include-self', action='store_true', help='Учитывать файлы самого объекта')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        index = ReferenceIndex(args.config_path, args.index_path)
+        index.update()
+        for full_name in args.find:
+            for rel_path in index.files_referencing(full_name, args.include_self):
+                print(f"{full_name}\t{rel_path}")
+        if args.retarget:
+            changed = index.retarget_references(args.retarget[0], args.retarget[1], args.include_self)
+            logging.info(f"Изменено файлов: {len(changed)}")
+        index.save()
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
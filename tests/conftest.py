@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Общие фикстуры: копия выгрузки из репозитория во временной папке."""
+import os
+import sys
+import shutil
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DUMP_ENTRIES = ["Configuration.xml", "ConfigDumpInfo.xml", "AccumulationRegisters", "Catalogs", "CommonForms",
+                "CommonModules", "Documents", "Ext", "InformationRegisters", "Languages", "Reports"]
+
+@pytest.fixture
+def dump_path(tmp_path):
+    """Копия выгрузки конфигурации; исходная выгрузка в репозитории не меняется."""
+    path = tmp_path / "config"
+    path.mkdir()
+    for entry in DUMP_ENTRIES:
+        source = os.path.join(REPO_ROOT, entry)
+        if os.path.isdir(source):
+            shutil.copytree(source, path / entry)
+        else:
+            shutil.copy2(source, path / entry)
+    return str(path)
+
+@pytest.fixture
+def clean_dump_path(dump_path):
+    """Копия выгрузки без мусорных записей Catalog.УТО_Тест (оставленных прошлыми запусками клонирования)."""
+    from config_index import ConfigIndex
+    index = ConfigIndex(dump_path)
+    index.remove_child("Catalog.УТО_Тест")
+    index.remove_dump_entry("Catalog.УТО_Тест")
+    index.save()
+    os.remove(os.path.join(dump_path, "Catalogs", "УТО_Тест.xml"))
+    shutil.rmtree(os.path.join(dump_path, "Catalogs", "УТО_Тест"), ignore_errors=True)
+    return dump_path
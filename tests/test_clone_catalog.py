@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Клонирование справочника: в файлах клона не остаётся имён донора."""
+import os
+import re
+import copy
+
+from lxml import etree
+
+from config_index import MD_NS, XR_NS
+import clone_catalog_linux as clone
+
+def add_tabular_section(config_path):
+    """Добавить справочнику Предметы табличную часть (по образцу Уроки документа УчебныйДень) и модуль с ссылками на неё."""
+    document = etree.parse(os.path.join(config_path, "Documents", "УчебныйДень.xml"))
+    section = copy.deepcopy(document.find(f".//{MD_NS}TabularSection"))
+    for generated in section.iter(f"{XR_NS}GeneratedType"):
+        generated.set("name", generated.get("name").replace("Document", "Catalog").replace("УчебныйДень", "Предметы"))
+    catalog_path = os.path.join(config_path, "Catalogs", "Предметы.xml")
+    catalog = etree.parse(catalog_path)
+    catalog.find(f".//{MD_NS}Catalog/{MD_NS}ChildObjects").append(section)
+    catalog.write(catalog_path, encoding="UTF-8", xml_declaration=True)
+    module_dir = os.path.join(config_path, "Catalogs", "Предметы", "Ext")
+    os.makedirs(module_dir, exist_ok=True)
+    with open(os.path.join(module_dir, "ObjectModule.bsl"), "w", encoding="utf-8") as f:
+        f.write("Процедура Заполнить(Строки)\n"
+                "\t// Строки: СправочникТабличнаяЧасть.Предметы.Уроки, строка — СправочникТабличнаяЧастьСтрока.Предметы.Уроки\n"
+                "\tМенеджер = Справочники.Предметы;\n"
+                "КонецПроцедуры\n")
+
+def donor_names(path):
+    with open(path, encoding="utf-8") as f:
+        return re.findall(r'(?<!\w)\w+\.Предметы(?!\w)', f.read())
+
+def test_clone_renames_tabular_section_types(dump_path):
+    add_tabular_section(dump_path)
+    clone.clone_objects(dump_path, [("Предметы", "П2")], workers=1)
+
+    target_files = [os.path.join(dump_path, "Catalogs", "П2.xml")]
+    for root, _, files in os.walk(os.path.join(dump_path, "Catalogs", "П2")):
+        target_files += [os.path.join(root, name) for name in files]
+    leftovers = {path: donor_names(path) for path in target_files if donor_names(path)}
+    assert not leftovers
+
+    catalog = etree.parse(target_files[0])
+    names = {node.get("name") for node in catalog.iter(f"{XR_NS}GeneratedType")}
+    assert "CatalogTabularSection.П2.Уроки" in names
+    assert "CatalogTabularSectionRow.П2.Уроки" in names
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Добавление и удаление узлов ChildObjects и записей ConfigDumpInfo без порчи отступов."""
+import os
+import copy
+
+import pytest
+
+from config_index import ConfigIndex, DUMP_NS
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_clean_fixture_has_no_duplicates(clean_dump_path):
+    configuration = read(os.path.join(clean_dump_path, "Configuration.xml")).decode('utf-8')
+    dump_info = read(os.path.join(clean_dump_path, "ConfigDumpInfo.xml")).decode('utf-8')
+    assert "УТО_Тест" not in configuration and "УТО_Тест" not in dump_info
+    assert "\n\t\t\t<Document>УчебныйДень</Document>\n" in configuration
+    assert dump_info.endswith("\n\t</ConfigVersions>\n</ConfigDumpInfo>\n")
+
+@pytest.mark.parametrize("full_name, expected", [
+    # Посередине: после последнего узла своего типа
+    ("Catalog.Новый", "\t\t\t<Catalog>Предметы</Catalog>\n\t\t\t<Catalog>Новый</Catalog>\n\t\t\t<Document>"),
+    # Последний узел ChildObjects: отступ закрывающего тега остаётся за новым узлом
+    ("AccumulationRegister.Новый", "<AccumulationRegister>Новый</AccumulationRegister>\n\t\t</ChildObjects>"),
+    # Типа ещё нет: перед первым узлом более позднего типа по CHILD_OBJECTS_ORDER
+    ("DataProcessor.Новый", "<Report>ПрошедшиеЗанятия</Report>\n\t\t\t<DataProcessor>Новый</DataProcessor>\n"
+                            "\t\t\t<InformationRegister>"),
+])
+def test_add_then_remove_child_round_trip(clean_dump_path, full_name, expected):
+    path = os.path.join(clean_dump_path, "Configuration.xml")
+    original = read(path)
+    index = ConfigIndex(clean_dump_path)
+    index.add_child(full_name)
+    index.save_configuration()
+    assert expected in read(path).decode('utf-8')
+
+    index = ConfigIndex(clean_dump_path)
+    assert index.remove_child(full_name) == 1
+    index.save_configuration()
+    assert read(path) == original
+
+def donor_entry(index, donor, name):
+    """Копия корневой записи донора с другим именем (как у клона)."""
+    entry = copy.deepcopy(index.dump_group(donor)[0])
+    for meta in entry.iter(f"{DUMP_NS}Metadata"):
+        meta.set("name", meta.get("name").replace(donor, name, 1))
+    return entry
+
+@pytest.mark.parametrize("donor, name", [
+    ("Catalog.Кабинеты", "Catalog.Новый"),
+    # Последняя запись ConfigVersions: новая запись встаёт перед отступом закрывающего тега
+    ("Report.Успеваемость", "Report.Новый"),
+])
+def test_add_then_remove_dump_entry_round_trip(clean_dump_path, donor, name):
+    path = os.path.join(clean_dump_path, "ConfigDumpInfo.xml")
+    original = read(path)
+    index = ConfigIndex(clean_dump_path)
+    index.add_dump_entry(donor_entry(index, donor, name))
+    index.save_dump_info()
+    text = read(path).decode('utf-8')
+    assert f'\n\t\t<Metadata name="{name}"' in text
+    assert text.endswith("\n\t</ConfigVersions>\n</ConfigDumpInfo>\n")
+
+    index = ConfigIndex(clean_dump_path)
+    assert index.remove_dump_entry(name) == 1
+    index.save_dump_info()
+    assert read(path) == original
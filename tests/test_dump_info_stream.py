@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Потоковое внедрение в ConfigDumpInfo.xml даёт те же байты, что и обработка дерева в памяти."""
+import os
+import shutil
+import functools
+
+import pytest
+
+import clone_catalog_linux as clone
+from dump_info import DumpInfoStream
+
+PAIRS = [
+    [("Предметы", "П2")],
+    [("Предметы", "П2"), ("Document.УчебныйДень", "Document.День2"), ("Report.Успеваемость", "Report.Отчет2")],
+]
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def run_clone(config_path, pairs, stream, monkeypatch, chunk_size=None):
+    monkeypatch.setattr(clone, "uuid_namespace", None)
+    if chunk_size is not None:
+        monkeypatch.setattr(clone, "DumpInfoStream", functools.partial(DumpInfoStream, chunk_size=chunk_size))
+    clone.clone_objects(config_path, pairs, workers=1, deterministic_uuids=True, stream_dump_info=stream)
+    return read(os.path.join(config_path, "ConfigDumpInfo.xml")), read(os.path.join(config_path, "Configuration.xml"))
+
+@pytest.mark.parametrize("chunk_size", [None, 7])
+@pytest.mark.parametrize("pairs", PAIRS)
+def test_stream_matches_dom(clean_dump_path, tmp_path, monkeypatch, pairs, chunk_size):
+    stream_path = str(tmp_path / "stream")
+    shutil.copytree(clean_dump_path, stream_path)
+    dom = run_clone(clean_dump_path, pairs, False, monkeypatch)
+    streamed = run_clone(stream_path, pairs, True, monkeypatch, chunk_size)
+    assert streamed == dom
+
+    # Повторный запуск удаляет записи прежних клонов и вставляет заново: результат тот же
+    assert run_clone(clean_dump_path, pairs, False, monkeypatch) == dom
+    assert run_clone(stream_path, pairs, True, monkeypatch, chunk_size) == dom
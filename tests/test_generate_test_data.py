@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Проверки генератора тестовых данных на выгрузке из репозитория."""
+import os
+import sys
+import datetime
+
+import pytest
+from lxml import etree
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from generate_test_data import generate_data
+
+V8 = "{http://v8.1c.ru/8.1/data/enterprise/current-config}"
+
+def document_numbers(path):
+    root = etree.parse(path).getroot()
+    return [node.findtext(f"{V8}Number") for node in root.iter(f"{V8}DocumentObject.УчебныйДень")]
+
+@pytest.mark.parametrize("per_day", [1, 3])
+def test_document_numbers_unique(tmp_path, per_day):
+    output = str(tmp_path / "data.xml")
+    stats = generate_data(REPO_ROOT, output, start=datetime.date(2024, 9, 1), end=datetime.date(2024, 9, 30),
+                          per_day=per_day, workers=2)
+    numbers = document_numbers(output)
+    assert len(numbers) == stats["documents"] == 30 * per_day
+    assert len(set(numbers)) == len(numbers)
+    assert all(len(number) <= 8 for number in numbers)
+
+def test_output_independent_of_workers(tmp_path):
+    outputs = []
+    for workers in (1, 3):
+        output = tmp_path / f"data{workers}.xml"
+        generate_data(REPO_ROOT, str(output), start=datetime.date(2024, 9, 1), end=datetime.date(2024, 9, 20),
+                      per_day=2, workers=workers, seed=7)
+        outputs.append(output.read_bytes())
+    assert outputs[0] == outputs[1]
+
+def test_numbers_overflow_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        generate_data(REPO_ROOT, str(tmp_path / "data.xml"), start=datetime.date(2024, 9, 1),
+                      end=datetime.date(2025, 8, 31), per_day=300000, workers=1)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Запись XML с минимальным диффом: результат всегда совпадает с полной сериализацией."""
+import os
+
+import pytest
+from lxml import etree
+
+import xml_writer
+from config_index import MD_NS
+from xml_writer import parse_xml, serialize, write_atomic, write_xml
+
+ROOT_FILES = ["Configuration.xml", "ConfigDumpInfo.xml", os.path.join("Catalogs", "Предметы.xml"),
+              os.path.join("Documents", "УчебныйДень.xml")]
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@pytest.mark.parametrize("rel_path", ROOT_FILES)
+def test_noop_round_trip_is_byte_identical(dump_path, rel_path):
+    path = os.path.join(dump_path, rel_path)
+    before = read(path)
+    stat = os.stat(path)
+    tree, original = parse_xml(path)
+    assert serialize(tree, original) == before
+    write_xml(path, tree, original)
+    assert read(path) == before
+    # Без изменений файл не перезаписывается
+    assert os.stat(path).st_ino == stat.st_ino
+
+def child_objects(tree):
+    return tree.getroot().find(f".//{MD_NS}ChildObjects")
+
+def insert_and_delete(tree):
+    children = child_objects(tree)
+    node = etree.SubElement(children, f"{MD_NS}Catalog")
+    node.text = "Новый"
+    node.addprevious(etree.Element(f"{MD_NS}Catalog"))
+    children.remove(children[0])
+
+def change_first(tree):
+    tree.getroot().set("version", "2.99")
+
+def change_last(tree):
+    child_objects(tree)[-1].text += "_"
+
+@pytest.mark.parametrize("block_size", [xml_writer.BLOCK_SIZE, 16, 1])
+@pytest.mark.parametrize("mutate", [insert_and_delete, change_first, change_last])
+def test_splice_equals_full_serialize(dump_path, monkeypatch, block_size, mutate):
+    monkeypatch.setattr(xml_writer, "BLOCK_SIZE", block_size)
+    path = os.path.join(dump_path, "Configuration.xml")
+    tree, original = parse_xml(path)
+    mutate(tree)
+    new = write_xml(path, tree, original)
+    assert new == serialize(tree, original)
+    assert read(path) == new
+
+def test_splice_with_repeated_content(tmp_path):
+    # Общие начало и конец перекрываются на повторяющихся байтах: середина не должна уйти в минус
+    path = str(tmp_path / "repeat.xml")
+    with open(path, 'wb') as f:
+        f.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<a><b/><b/><b/></a>\n')
+    tree, original = parse_xml(path)
+    root = tree.getroot()
+    root.remove(root[1])
+    new = write_xml(path, tree, original)
+    assert read(path) == new == b'<?xml version="1.0" encoding="UTF-8"?>\n<a><b/><b/></a>\n'
+    root.append(etree.Element("b"))
+    root.append(etree.Element("b"))
+    new = write_xml(path, tree, new)
+    assert read(path) == new == b'<?xml version="1.0" encoding="UTF-8"?>\n<a><b/><b/><b/><b/></a>\n'
+
+def test_write_atomic_pieces(tmp_path):
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"0123456789")
+    target = str(tmp_path / "target.bin")
+    with open(source, 'rb') as src:
+        write_atomic(target, pieces=(src.fileno(), [(0, 3), b"abc", (3, 0), (7, 3), b"", b"!"]))
+    assert read(target) == b"012abc789!"
+    assert sorted(os.listdir(tmp_path)) == ["source.bin", "target.bin"]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Проверка целостности выгрузки конфигурации 1C перед загрузкой в Designer.
+Все XML-файлы объектов разбираются пулом процессов за один проход, затем проверяются:
+- уникальность UUID (атрибуты uuid, xr:TypeId, xr:ValueId) по всей выгрузке;
+- согласованность имён: ChildObjects в Configuration.xml, файлы на диске и
+  корневые записи ConfigDumpInfo.xml (включая имя внутри файла и id записи);
+- разрешимость всех типов cfg:*Ref.X (и прочих cfg:<Тип>.X) в объекты конфигурации.
+Результат — JSON (или JSON Lines) со списком проблем и сводкой.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import logging
+import concurrent.futures
+from lxml import etree
+
+from config_index import ConfigIndex, TYPE_FOLDERS, MD_NS, XR_NS
+
+# Меньше файлов быстрее разобрать в текущем процессе
+SCAN_PARALLEL_THRESHOLD = 64
+
+PARSER = etree.XMLParser(collect_ids=False)
+
+CFG_TYPE_PATTERN = re.compile(r'cfg:(\w+)\.(\w+)')
+
+# Суффиксы сгенерированных типов: CatalogRef -> Catalog, InformationRegisterRecordSet -> InformationRegister
+GENERATED_SUFFIXES = ("TabularSectionRow", "TabularSection", "RecordManager", "RecordSet", "RecordKey", "Record",
+                      "Selection", "Manager", "Object", "List", "Ref")
+
+# Проверка -> серьёзность
+SEVERITY = {
+    "parse_error": "error",
+    "duplicate_uuid": "error",
+    "unresolved_type": "error",
+    "missing_file": "error",
+    "unlisted_file": "error",
+    "missing_dump_entry": "error",
+    "orphan_dump_entry": "error",
+    "duplicate_child": "error",
+    "duplicate_dump_entry": "error",
+    "name_mismatch": "error",
+    "dump_id_mismatch": "warning",
+}
+
+def generated_type_owner(prefix):
+    """Тип метаданных сгенерированного типа: 'CatalogRef' -> 'Catalog'."""
+    for suffix in GENERATED_SUFFIXES:
+        if prefix.endswith(suffix) and len(prefix) > len(suffix):
+            return prefix[:-len(suffix)]
+    return prefix
+
+# Узлы с uuid выбираются XPath в libxml2, без обхода всего дерева в Python
+FIND_UUID_NODES = etree.XPath("//*[@uuid]")
+
+def scan_file(path):
+    """Разбор одного файла (выполняется в процессе пула).
+
+    Возвращает (путь, ошибка, объект, uuids, типы): объект — (Тип, Имя, uuid) для
+    файла объекта или None; uuids — [(значение, вид, узел)]; типы — [(префикс, имя)].
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        root = etree.fromstring(data, PARSER)
+    except (OSError, etree.XMLSyntaxError) as e:
+        return path, str(e), None, [], []
+    uuids = []
+    owner = None
+    for node in FIND_UUID_NODES(root):
+        name = node.findtext(f"{MD_NS}Properties/{MD_NS}Name")
+        kind = etree.QName(node).localname
+        uuids.append((node.get("uuid"), "uuid", f"{kind}.{name}" if name else kind))
+        if owner is None and node.getparent() is root:
+            owner = (kind, name, node.get("uuid"))
+    for node in root.iter(f"{XR_NS}TypeId", f"{XR_NS}ValueId"):
+        if node.text and node.text.strip():
+            uuids.append((node.text.strip(), etree.QName(node).localname, node.getparent().get("name")))
+    # Типы ищутся в тексте файла: документ уже проверен на корректность разбором
+    types = set(CFG_TYPE_PATTERN.findall(data.decode('utf-8'))) if b'cfg:' in data else set()
+    return path, None, owner, uuids, sorted(types)
+
+def collect_files(config_path):
+    """Все XML-файлы в папках типов метаданных."""
+    paths = []
+    for folder in sorted(set(TYPE_FOLDERS.values())):
+        for root, dirs, files in os.walk(os.path.join(config_path, folder)):
+            dirs.sort()
+            paths.extend(os.path.join(root, file) for file in sorted(files) if file.endswith('.xml'))
+    return paths
+
+def scan_files(paths, workers=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(paths) >= SCAN_PARALLEL_THRESHOLD:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(paths) // (workers * 8))
+            return list(pool.map(scan_file, paths, chunksize=chunksize))
+    return [scan_file(path) for path in paths]
+
+def validate(config_path, workers=None):
+    """Проверить выгрузку. Возвращает отчёт: {config_path, files, seconds, issues, summary}."""
+    start = time.perf_counter()
+    issues = []
+
+    def report(check, message, **details):
+        issues.append(dict(check=check, severity=SEVERITY[check], message=message, **details))
+
+    index = ConfigIndex(config_path)
+
+    # Имена из ChildObjects (все типы, с повторами)
+    child_names = {}
+    for node in index.child_objects:
+        if isinstance(node.tag, str):
+            full_name = f"{etree.QName(node).localname}.{node.text}"
+            child_names[full_name] = child_names.get(full_name, 0) + 1
+    for full_name, count in child_names.items():
+        if count > 1:
+            report("duplicate_child", f"{full_name} указан в ChildObjects {count} раз", object=full_name, count=count)
+
+    # Корневые записи ConfigDumpInfo.xml
+    dump_ids = {}
+    for meta in index.config_versions:
+        if not isinstance(meta.tag, str):
+            continue
+        full_name = meta.get("name") or ""
+        if full_name.count('.') != 1 or full_name.startswith("Configuration."):
+            continue
+        dump_ids.setdefault(full_name, []).append(meta.get("id"))
+    for full_name, ids in dump_ids.items():
+        if len(ids) > 1:
+            report("duplicate_dump_entry", f"{full_name} записан в ConfigDumpInfo.xml {len(ids)} раз",
+                   object=full_name, count=len(ids))
+        if full_name not in child_names:
+            report("orphan_dump_entry", f"Запись {full_name} в ConfigDumpInfo.xml без ChildObjects", object=full_name)
+    for full_name in child_names:
+        if full_name not in dump_ids:
+            report("missing_dump_entry", f"{full_name} нет в ConfigDumpInfo.xml", object=full_name)
+
+    # Разбор всех файлов
+    paths = collect_files(config_path)
+    results = scan_files(paths, workers)
+
+    # Файлы объектов: <Папка>/<Имя>.xml
+    folder_types = {folder: type_name for type_name, folder in TYPE_FOLDERS.items()}
+    object_files = {}
+    seen_uuids = {}
+    referenced = {}
+    for path, error, owner, uuids, types in results:
+        rel_path = os.path.relpath(path, config_path)
+        if error is not None:
+            report("parse_error", f"{rel_path}: {error}", path=rel_path)
+            continue
+        parts = rel_path.split(os.sep)
+        if len(parts) == 2 and parts[0] in folder_types:
+            full_name = f"{folder_types[parts[0]]}.{os.path.splitext(parts[1])[0]}"
+            object_files[full_name] = rel_path
+            if owner is not None and f"{owner[0]}.{owner[1]}" != full_name:
+                report("name_mismatch", f"{rel_path} описывает {owner[0]}.{owner[1]}", path=rel_path,
+                       object=full_name, found=f"{owner[0]}.{owner[1]}")
+            ids = dump_ids.get(full_name)
+            if owner is not None and ids and owner[2] not in ids:
+                report("dump_id_mismatch", f"id записи {full_name} в ConfigDumpInfo.xml не совпадает с uuid объекта",
+                       object=full_name, uuid=owner[2], dump_ids=ids)
+        for value, kind, label in uuids:
+            seen_uuids.setdefault(value, []).append({"path": rel_path, "kind": kind, "node": label})
+        for prefix, name in types:
+            referenced.setdefault((prefix, name), []).append(rel_path)
+
+    for full_name in child_names:
+        type_name = full_name.split('.', 1)[0]
+        if type_name in TYPE_FOLDERS and full_name not in object_files:
+            report("missing_file", f"Нет файла для {full_name}", object=full_name,
+                   path=os.path.relpath(index.file_path(full_name), config_path))
+    for full_name, rel_path in object_files.items():
+        if full_name not in child_names:
+            report("unlisted_file", f"{rel_path} не указан в ChildObjects", object=full_name, path=rel_path)
+
+    for value, places in seen_uuids.items():
+        if len(places) > 1:
+            report("duplicate_uuid", f"UUID {value} встречается {len(places)} раз", uuid=value, places=places)
+
+    for (prefix, name), files in sorted(referenced.items()):
+        target = f"{generated_type_owner(prefix)}.{name}"
+        if target not in child_names:
+            report("unresolved_type", f"cfg:{prefix}.{name} не найден в конфигурации", type=f"cfg:{prefix}.{name}",
+                   object=target, paths=files)
+
+    summary = {}
+    for issue in issues:
+        summary[issue["check"]] = summary.get(issue["check"], 0) + 1
+    return {
+        "config_path": os.path.abspath(config_path),
+        "files": len(paths),
+        "objects": len(child_names),
+        "uuids": len(seen_uuids),
+        "seconds": round(time.perf_counter() - start, 3),
+        "errors": sum(1 for issue in issues if issue["severity"] == "error"),
+        "warnings": sum(1 for issue in issues if issue["severity"] == "warning"),
+        "summary": summary,
+        "issues": issues,
+    }
+
+def write_report(report, stream, output_format):
+    if output_format == "jsonl":
+        for issue in report["issues"]:
+            stream.write(json.dumps(issue, ensure_ascii=False) + "\n")
+    else:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+        stream.write("\n")
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка целостности выгрузки 1C (UUID, имена, ссылки на типы).")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Путь к конфигурации (по умолчанию текущая директория)')
+    parser.add_argument('--workers', type=int, help='Число процессов для разбора файлов (1 — без пула)')
+    parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                        help='json — отчёт целиком, jsonl — по одной проблеме в строке')
+    parser.add_argument('--output', help='Файл отчёта (по умолчанию stdout)')
+    parser.add_argument('--strict', action='store_true', help='Считать предупреждения ошибками (код возврата)')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        report = validate(args.config_path, args.workers)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                write_report(report, f, args.format)
+        else:
+            write_report(report, sys.stdout, args.format)
+        logging.info(f"Проверено файлов: {report['files']} за {report['seconds']} с; "
+                     f"ошибок: {report['errors']}, предупреждений: {report['warnings']}")
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+    failed = report["errors"] + (report["warnings"] if args.strict else 0)
+    exit(2 if failed else 0)
+
+if __name__ == "__main__":
+    main()
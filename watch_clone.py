@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Режим наблюдения для clone_catalog_linux.py.
+Процесс держит в памяти индекс Configuration.xml и ConfigDumpInfo.xml, следит
+(inotify, либо опросом mtime, если inotify недоступен) за файлами объектов-доноров
+и после паузы в изменениях (debounce) повторяет только затронутые шаги клонирования:
+- изменился <Папка>/<Донор>.xml — пересоздаётся <Папка>/<Цель>.xml и записи в корневых файлах;
+- изменился файл в <Папка>/<Донор>/ — переклонируется только этот файл.
+Корневые файлы пишутся атомарно, один раз на пачку изменений.
+"""
+
+import os
+import time
+import errno
+import select
+import shutil
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import logging
+
+import clone_catalog_linux as clone
+from config_index import ConfigIndex, GENERATED_TYPES, split_full_name
+from dump_info import DigestCache, SUBOBJECT_FOLDERS
+
+# Флаги inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyWatcher:
+    """Наблюдение за папками через inotify (ctypes, без внешних зависимостей)."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify недоступен")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._paths = {}  # wd -> папка
+
+    def add_tree(self, path):
+        """Наблюдать за папкой и всеми вложенными папками."""
+        for root, dirs, files in os.walk(path):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {root}")
+            self._paths[wd] = root
+
+    def add_dir(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {path}")
+        self._paths[wd] = path
+
+    def read(self, timeout):
+        """Дождаться событий (не дольше timeout секунд, None — бесконечно). Возвращает [(путь, это папка)]."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, True))
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            directory = self._paths.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            is_dir = bool(mask & IN_ISDIR)
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+                # Новая папка внутри наблюдаемой: подписываемся и на неё
+                self.add_tree(path)
+            events.append((path, is_dir))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Запасной вариант без inotify: сравнение mtime/размеров файлов с заданным интервалом."""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._roots = []
+        self._snapshot = {}
+
+    def _scan(self):
+        snapshot = {}
+        for root, recursive in self._roots:
+            if recursive:
+                for directory, dirs, files in os.walk(root):
+                    for name in files:
+                        self._stat(os.path.join(directory, name), snapshot)
+            elif os.path.isdir(root):
+                for entry in os.scandir(root):
+                    if entry.is_file():
+                        self._stat(entry.path, snapshot)
+        return snapshot
+
+    @staticmethod
+    def _stat(path, snapshot):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def add_tree(self, path):
+        self._roots.append((path, True))
+        self._snapshot = self._scan()
+
+    def add_dir(self, path):
+        self._roots.append((path, False))
+        self._snapshot = self._scan()
+
+    def read(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = [path for path in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(path) != self._snapshot.get(path)]
+        self._snapshot = snapshot
+        return [(path, False) for path in changed]
+
+    def close(self):
+        pass
+
+class CloneSession:
+    """Резидентное состояние: индекс корневых файлов, кэш хэшей и пары клонирования."""
+
+    def __init__(self, config_path, pairs, workers=None, link_mode='copy', deterministic_uuids=False,
+                 default_type="Catalog"):
+        self.pairs = [clone.qualify_pair(source, target, default_type) for source, target in pairs]
+        clone.check_pairs(self.pairs)
+        self.config_path = config_path
+        self.workers = workers
+        self.link_mode = link_mode
+        self.deterministic_uuids = deterministic_uuids
+        self.load()
+
+    def load(self):
+        """(Пере)загрузка корневых файлов с диска."""
+        self.index = ConfigIndex(self.config_path)
+        self.cache = DigestCache(self.config_path)
+        if self.deterministic_uuids:
+            clone.set_deterministic_uuids(self.index.config_id)
+        for source, _ in self.pairs:
+            path = self.index.file_path(source)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Файл не найден: {path}")
+
+    def apply_all(self):
+        for source, target in self.pairs:
+            clone.apply_clone(self.index, source, target, self.workers, self.link_mode)
+        clone.save_clone_results(self.index, self.cache)
+
+    def classify(self, path):
+        """Что затронуто изменением path: ('object', [пары]), ('file', [пары], отн. путь), ('root',) или None."""
+        if path is None:
+            return ("all",)
+        if path in (self.index.configuration_path, self.index.dump_info_path):
+            return ("root",)
+        pairs = [pair for pair in self.pairs if self.index.file_path(pair[0]) == path]
+        if pairs:
+            return ("object", pairs)
+        for source, _ in self.pairs:
+            source_dir = self.index.object_dir(source)
+            if path.startswith(source_dir + os.sep):
+                rest = os.path.relpath(path, source_dir)
+                if os.path.basename(rest).startswith('.'):
+                    return None
+                return ("file", [pair for pair in self.pairs if pair[0] == source], rest)
+        return None
+
+    def clone_file(self, source, target, rel_path):
+        """Переклонировать один файл папки донора (или удалить его копию, если донорский файл удалён)."""
+        type_name, source_name = split_full_name(source)
+        target_name = split_full_name(target)[1]
+        source_path = os.path.join(self.index.object_dir(source), rel_path)
+        target_path = os.path.join(self.index.object_dir(target), rel_path)
+        if os.path.isdir(target_path) and not os.path.isdir(source_path):
+            shutil.rmtree(target_path)
+        elif os.path.lexists(target_path):
+            # Копия может быть жёсткой ссылкой на донора: её нельзя переписывать на месте
+            os.remove(target_path)
+        if os.path.isdir(source_path):
+            clone.clone_object_dir(source_path, target_path, source_name, target_name, self.link_mode, self.workers,
+                                   type_name)
+            return
+        if not os.path.isfile(source_path):
+            logging.info(f"Удалён: {target_path}")
+            return
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        count = 0
+        if source_path.endswith('.xml') or source_path.endswith('.bsl'):
+            _, _, _, count, error = clone.rewrite_file(source_path, clone.object_renames(source_name, target_name, type_name),
+                                                       target_path)
+            if error is not None:
+                raise OSError(f"Не удалось клонировать {source_path}: {error}")
+        if not count:
+            clone.link_file(source_path, target_path, self.link_mode)
+        folder, _, file = rel_path.partition(os.sep)
+        kinds = {sub_folder: kind for kind, sub_folder in SUBOBJECT_FOLDERS.items()}
+        if folder in kinds and file.endswith('.xml') and os.sep not in file:
+            # Описание формы или макета: UUID клона не должны совпадать с донорскими
+            clone.regenerate_descriptor_uuids(target_path, target, kinds[folder], target_name)
+        clone.record_touched(target_path)
+        logging.info(f"Обновлён: {target_path}")
+
+    def apply(self, changes):
+        """Применить накопленные изменения и записать корневые файлы. Возвращает затронутые цели."""
+        kinds = {change[0] for change in changes}
+        if "all" in kinds or ("root" in kinds and self.index.changed_on_disk()):
+            logging.info("Корневые файлы изменены извне: полная перезагрузка")
+            self.load()
+            self.apply_all()
+            return [target for _, target in self.pairs]
+        targets = []
+        objects = {pair for change in changes if change[0] == "object" for pair in change[1]}
+        files = {(pair, change[2]) for change in changes if change[0] == "file" for pair in change[1]}
+        for source, target in sorted(objects):
+            clone.apply_clone(self.index, source, target, self.workers, self.link_mode, clone_dir=False)
+            targets.append(target)
+        for (source, target), rel_path in sorted(files):
+            self.clone_file(source, target, rel_path)
+            if target not in targets:
+                targets.append(target)
+        if targets:
+            clone.save_clone_results(self.index, self.cache, only=set(targets))
+        return targets
+
+def create_watcher(session, poll_interval=None):
+    """inotify, если доступен; иначе (или при явном poll_interval) — опрос."""
+    watcher = None
+    if poll_interval is None:
+        try:
+            watcher = InotifyWatcher()
+        except OSError as e:
+            logging.warning(f"inotify недоступен ({e}), используется опрос")
+    if watcher is None:
+        watcher = PollingWatcher(poll_interval or 0.5)
+    watcher.add_dir(session.config_path)
+    for folder in sorted({os.path.dirname(session.index.file_path(source)) for source, _ in session.pairs}):
+        watcher.add_dir(folder)
+    for source in sorted({source for source, _ in session.pairs}):
+        source_dir = session.index.object_dir(source)
+        if os.path.isdir(source_dir):
+            watcher.add_tree(source_dir)
+    return watcher
+
+def watch(session, debounce=0.2, poll_interval=None, initial=True):
+    """Основной цикл: собрать изменения, выждать debounce секунд тишины, применить."""
+    if initial:
+        started = time.perf_counter()
+        session.apply_all()
+        logging.info(f"Начальное клонирование: {(time.perf_counter() - started) * 1000:.0f} мс")
+    watcher = create_watcher(session, poll_interval)
+    sources = ', '.join(sorted({source for source, _ in session.pairs}))
+    logging.info(f"Наблюдение за {sources} ({type(watcher).__name__}), Ctrl+C для выхода")
+    pending = []
+    first_event = deadline = None
+    try:
+        while True:
+            timeout = None if not pending else max(0.0, deadline - time.monotonic())
+            events = watcher.read(timeout)
+            for path, is_dir in events:
+                change = session.classify(path)
+                if change is None:
+                    continue
+                if not pending:
+                    first_event = time.perf_counter()
+                pending.append(change)
+                deadline = time.monotonic() + debounce
+            if pending and time.monotonic() >= deadline:
+                changes, pending = pending, []
+                try:
+                    targets = session.apply(changes)
+                except Exception as e:
+                    logging.error(f"Ошибка применения изменений: {e}")
+                    continue
+                if targets:
+                    logging.info(f"Обновлено: {', '.join(targets)} за {(time.perf_counter() - first_event - debounce) * 1000:.0f} мс "
+                                 f"(после паузы {debounce * 1000:.0f} мс)")
+    except KeyboardInterrupt:
+        logging.info("Наблюдение остановлено")
+    finally:
+        watcher.close()
+
+def setup_logging(verbose=False):
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Наблюдение за объектами-донорами и инкрементальное переклонирование.")
+    parser.add_argument('--config-path', default=os.getcwd(), help='Путь к конфигурации (по умолчанию текущая директория)')
+    parser.add_argument('--source', default='Предметы', help='Исходный объект для клонирования (Имя или Тип.Имя)')
+    parser.add_argument('--target', default='УТО_Тест', help='Целевой объект (Имя или Тип.Имя)')
+    parser.add_argument('--type', dest='default_type', choices=sorted(GENERATED_TYPES), default='Catalog',
+                        help='Тип метаданных для коротких имён (по умолчанию Catalog)')
+    parser.add_argument('--manifest', help='Файл с парами "Источник -> Цель" (заменяет --source/--target)')
+    parser.add_argument('--workers', type=int, help='Число процессов для замены имён в папке объекта (1 — без пула)')
+    parser.add_argument('--link-mode', choices=['copy', 'reflink', 'hardlink', 'auto'], default='copy',
+                        help='Как переносить файлы папки объекта без вхождений имени (при hardlink правка файла '
+                             'клона на месте меняет и донора)')
+    parser.add_argument('--deterministic-uuids', action='store_true', help='Детерминированные UUID (как в clone_catalog_linux.py)')
+    parser.add_argument('--debounce', type=int, default=200, help='Пауза в изменениях перед применением, мс')
+    parser.add_argument('--poll', type=float, metavar='СЕКУНД', help='Опрашивать файлы с этим интервалом вместо inotify')
+    parser.add_argument('--no-initial', action='store_true', help='Не выполнять полное клонирование при запуске')
+    parser.add_argument('--verbose', action='store_true', help='Включить подробное логирование')
+
+    args = parser.parse_args()
+    setup_logging(args.verbose)
+
+    try:
+        pairs = clone.read_manifest(args.manifest) if args.manifest else [(args.source, args.target)]
+        session = CloneSession(args.config_path, pairs, args.workers, args.link_mode, args.deterministic_uuids,
+                               args.default_type)
+        watch(session, args.debounce / 1000, args.poll, not args.no_initial)
+    except Exception as e:
+        logging.error(f"КРИТИЧЕСКАЯ ОШИБКА: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
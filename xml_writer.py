@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Запись XML-файлов выгрузки с минимальным диффом.
+Дерево сериализуется без переформатирования (lxml сохраняет исходные отступы),
+заголовок (BOM, объявление XML с исходными кавычками) берётся из исходного файла.
+В новый файл из исходного байтового потока копируются совпадающие начало и конец,
+записывается только изменившаяся середина; замена файла атомарна (временный файл + rename).
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+from lxml import etree
+
+from instrumentation import tracer
+
+BLOCK_SIZE = 1 << 16
+
+DEFAULT_HEADER = b'\xef\xbb\xbf<?xml version="1.0" encoding="UTF-8"?>\n'
+
+def split_header(data):
+    """Разделить байты файла на заголовок (BOM + <?xml ...?> + перевод строки) и остальное."""
+    start = 3 if data.startswith(b'\xef\xbb\xbf') else 0
+    if data.startswith(b'<?xml', start):
+        end = data.index(b'?>', start) + 2
+        while end < len(data) and data[end:end + 1] in (b'\r', b'\n'):
+            end += 1
+        return data[:end], data[end:]
+    return data[:start], data[start:]
+
+def serialize(tree, original=None):
+    """Сериализация дерева в формате исходного файла (или донора, для нового файла)."""
+    header = split_header(original)[0] if original else DEFAULT_HEADER
+    body = etree.tostring(tree.getroot(), encoding='UTF-8')
+    if original:
+        # Сохраняем хвост после корневого элемента (обычно перевод строки или его отсутствие)
+        rest = split_header(original)[1]
+        tail = rest[len(rest.rstrip()):]
+        return header + body + tail
+    return header + body
+
+def common_prefix_length(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i:i + BLOCK_SIZE] == b[i:i + BLOCK_SIZE]:
+        i += BLOCK_SIZE
+    if i >= n:
+        return n
+    # Различие внутри блока — бинарный поиск
+    lo, hi = i, min(i + BLOCK_SIZE, n)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[i:mid + 1] == b[i:mid + 1]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def common_suffix_length(a, b, limit):
+    """Длина общего окончания, не длиннее limit (чтобы не пересекаться с общим началом)."""
+    n = min(len(a), len(b), limit)
+    i = 0
+    while i < n:
+        size = min(BLOCK_SIZE, n - i)
+        if a[len(a) - i - size:len(a) - i] != b[len(b) - i - size:len(b) - i]:
+            break
+        i += size
+    if i >= n:
+        return n
+    lo, hi = i, min(i + BLOCK_SIZE, n)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[len(a) - mid - 1:len(a) - i] == b[len(b) - mid - 1:len(b) - i]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def copy_range(src_fd, dst_fd, offset, count):
+    """Копирование диапазона файла средствами ядра (copy_file_range), с запасным путём через read/write."""
+    while count > 0:
+        copied = 0
+        if hasattr(os, 'copy_file_range'):
+            try:
+                copied = os.copy_file_range(src_fd, dst_fd, count, offset)
+            except OSError:
+                copied = 0
+        if copied <= 0:
+            chunk = os.pread(src_fd, min(count, BLOCK_SIZE * 16), offset)
+            if not chunk:
+                raise OSError("Исходный файл неожиданно закончился")
+            copied = os.write(dst_fd, chunk)
+        offset += copied
+        count -= copied
+
+def write_atomic(path, data=None, splice=None, pieces=None):
+    """Атомарная запись: временный файл в той же папке, fsync, os.replace.
+
+    splice = (original_fd, prefix, middle, old_end, suffix) — собрать файл из
+    исходного начала, новой середины и исходного конца без чтения их в память.
+    pieces = (original_fd, [часть, ...]) — то же для нескольких вставок: часть —
+    новые байты или диапазон (смещение, длина) исходного файла.
+    """
+    if splice is not None:
+        src_fd, prefix, middle, old_end, suffix = splice
+        pieces = (src_fd, [(0, prefix), middle, (old_end, suffix)])
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        written_bytes = 0
+        for item in ([data] if pieces is None else pieces[1]):
+            if isinstance(item, tuple):
+                copy_range(pieces[0], fd, *item)
+                continue
+            written_bytes += len(item)
+            view = memoryview(item)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        os.fsync(fd)
+        os.close(fd)
+        fd = None
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+        tracer.add(files_written=1, bytes_written=written_bytes)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_xml(path, tree, original=None):
+    """Записать дерево в path с минимальными изменениями относительно original.
+
+    original — байты файла на момент разбора (None — новый файл, заголовок по
+    умолчанию). Если содержимое не изменилось, файл не трогается.
+    Возвращает новые байты файла (их можно передать как original при следующей записи).
+    """
+    new = serialize(tree, original)
+    if original is None or not os.path.exists(path):
+        write_atomic(path, new)
+        return new
+    if new == original:
+        logging.debug(f"Без изменений: {path}")
+        return new
+    prefix = common_prefix_length(original, new)
+    suffix = common_suffix_length(original, new, min(len(original), len(new)) - prefix)
+    old_end = len(original) - suffix
+    middle = new[prefix:len(new) - suffix]
+    with open(path, 'rb') as src:
+        if os.fstat(src.fileno()).st_size != len(original):
+            # Файл изменился на диске после разбора — пишем целиком
+            logging.warning(f"Файл изменён после разбора, записывается целиком: {path}")
+            write_atomic(path, new)
+            return new
+        write_atomic(path, splice=(src.fileno(), prefix, middle, old_end, suffix))
+    logging.debug(f"{path}: заменено {old_end - prefix} байт на {len(middle)} со смещения {prefix}")
+    return new
+
+def parse_xml(path):
+    """Разбор файла с сохранением исходных байтов для write_xml. Возвращает (дерево, байты)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    tracer.add(files_read=1, bytes_read=len(data))
+    return etree.ElementTree(etree.fromstring(data)), data